@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Compara a geração com 1 processo e com N processos de renderização num modelo sintético.
+
+Usage:
+    bench_jobs.py
+    [--classes N]
+    [--jobs N]
+    [--repeat N]
+
+Options:
+    --classes N               Quantidade de classes do modelo sintético [default: 2000].
+    --jobs N                  Quantidade de processos da execução paralela [default: 4].
+    --repeat N                Quantidade de repetições de cada execução; vale o menor tempo [default: 3].
+"""
+
+import sys
+import time
+import logging
+import tempfile
+from os.path import join, abspath, dirname
+from docopt import docopt
+from synthetic import write_model
+
+package_folder = abspath(join(dirname(abspath(__file__)), '..', 'uml2fmw'))
+sys.path.insert(0, package_folder)
+from config import Config
+from generator import Generator
+
+
+def best_time(generator, jobs, repeat):
+    """Menor tempo de geração em 'repeat' execuções, junto com os códigos gerados."""
+    times = list()
+    for _ in range(repeat):
+        start = time.time()
+        genfiles_and_codes = generator.generate(jobs=jobs)
+        times.append(time.time() - start)
+    return min(times), genfiles_and_codes
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    parametros_script = docopt(__doc__)
+    classes = int(parametros_script['--classes'])
+    jobs = int(parametros_script['--jobs'])
+    repeat = int(parametros_script['--repeat'])
+
+    xml_file = join(tempfile.mkdtemp(), 'synthetic.xml')
+    write_model(xml_file, classes=classes)
+    generator = Generator(xml_file, Config.load(join(package_folder, 'config.yml')))
+
+    serial, serial_codes = best_time(generator, 1, repeat)
+    parallel, parallel_codes = best_time(generator, jobs, repeat)
+
+    print('classes: %d' % classes)
+    print('1 processo: %.3fs' % serial)
+    print('%d processos: %.3fs (%.2fx)' % (jobs, parallel, serial / parallel))
+    print('saída idêntica: %s' % (serial_codes == parallel_codes))
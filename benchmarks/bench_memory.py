@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Mede a memória usada pela leitura de um modelo sintético grande.
+
+O pico é o máximo de memória residente do processo durante a leitura do XML, e o valor estável é a memória residente
+depois da leitura, com o projeto carregado e a árvore XML descartada. Para que o pico não seja contaminado por outras
+medições, cada execução mede um único modelo.
+
+Usage:
+    bench_memory.py
+    [--classes N]
+    [--attributes N]
+
+Options:
+    --classes N               Quantidade de classes do modelo sintético [default: 5000].
+    --attributes N            Quantidade de atributos por classe [default: 8].
+"""
+
+import os
+import gc
+import sys
+import time
+import logging
+import resource
+import tempfile
+from os.path import join, abspath, dirname, getsize
+from docopt import docopt
+from synthetic import write_model
+
+package_folder = abspath(join(dirname(abspath(__file__)), '..', 'uml2fmw'))
+sys.path.insert(0, package_folder)
+from models.project import Project
+
+
+def resident_memory():
+    """Memória residente atual do processo, em MiB."""
+    with open('/proc/self/statm') as statm:
+        pages = int(statm.read().split()[1])
+    return pages * resource.getpagesize() / 1024.0 / 1024.0
+
+
+def peak_memory():
+    """Pico de memória residente do processo, em MiB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    parametros_script = docopt(__doc__)
+    classes = int(parametros_script['--classes'])
+    attributes = int(parametros_script['--attributes'])
+
+    xml_file = join(tempfile.mkdtemp(), 'synthetic.xml')
+    write_model(xml_file, classes=classes, attributes=attributes)
+
+    gc.collect()
+    baseline = resident_memory()
+    start = time.time()
+    project = Project.from_xml(xml_file)
+    elapsed = time.time() - start
+    gc.collect()
+
+    print('classes: %d, atributos por classe: %d, XML: %.1f MiB' %
+          (classes, attributes, getsize(xml_file) / 1024.0 / 1024.0))
+    print('leitura: %.3fs' % elapsed)
+    print('memória inicial: %.1f MiB' % baseline)
+    print('pico: %.1f MiB' % peak_memory())
+    print('estável: %.1f MiB (%.1f MiB do projeto)' % (resident_memory(), resident_memory() - baseline))
+    os.remove(xml_file)
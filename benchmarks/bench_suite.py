@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Mede o tempo e o pico de memória de cada etapa da geração num modelo sintético, gravando os resultados em JSON.
+
+As etapas medidas são a leitura do projeto (Project.from_xml), a conexão das classes pelas generalizações
+(Classes.connect), a renderização de cada template do scaffold e a geração completa (Generator.generate). Cada etapa é
+executada num processo filho criado por fork depois da preparação, de forma que o pico de memória medido seja o da
+própria etapa. Os resultados de execuções em commits diferentes podem ser comparados para encontrar regressões.
+
+Usage:
+    bench_suite.py
+    [--classes N]
+    [--attributes N]
+    [--associations N]
+    [--depth N]
+    [--tagged-values N]
+    [--output ARQUIVO]
+
+Options:
+    --classes N               Quantidade de classes do modelo sintético [default: 1000].
+    --attributes N            Quantidade de atributos por classe [default: 8].
+    --associations N          Quantidade de associações partindo de cada classe [default: 2].
+    --depth N                 Profundidade das hierarquias de generalização [default: 2].
+    --tagged-values N         Quantidade de tagged values por atributo [default: 3].
+    --output ARQUIVO          Arquivo JSON onde os resultados são gravados [default: benchmark.json].
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import resource
+import tempfile
+import traceback
+import subprocess
+from os.path import join, abspath, dirname, relpath
+from docopt import docopt
+from synthetic import write_model
+
+package_folder = abspath(join(dirname(abspath(__file__)), '..', 'uml2fmw'))
+sys.path.insert(0, package_folder)
+from config import Config
+from generator import Generator, Template
+from models.project import Project
+from models.loader import stream_xml
+
+
+def resident_memory():
+    """Memória residente atual do processo, em MiB."""
+    with open('/proc/self/statm') as statm:
+        pages = int(statm.read().split()[1])
+    return pages * resource.getpagesize() / 1024.0 / 1024.0
+
+
+def measure(function, *args):
+    """Executa a função com os argumentos informados num processo filho, retornando o tempo, a memória inicial e o pico
+    de memória em MiB.
+
+    O processo filho herda tudo o que foi preparado pelo processo principal, e o pico de memória dele começa na memória
+    residente no momento do fork. O filho sempre termina com os._exit, sem voltar ao código do processo principal, e
+    uma exceção na função é enviada pelo pipe e lançada novamente como RuntimeError, com o traceback do filho."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            try:
+                baseline = resident_memory()
+                start = time.time()
+                function(*args)
+                elapsed = time.time() - start
+                peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+                result = {'seconds': elapsed, 'baseline_mib': baseline, 'peak_mib': peak}
+                status = 0
+            except BaseException:
+                result = {'error': traceback.format_exc()}
+            with os.fdopen(write_fd, 'w') as pipe:
+                json.dump(result, pipe)
+        finally:
+            os._exit(status)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        content = pipe.read()
+    _, status = os.waitpid(pid, 0)
+    if not content:
+        raise RuntimeError('Processo filho terminou sem enviar resultados (status %d).' % status)
+    result = json.loads(content)
+    if 'error' in result:
+        raise RuntimeError('Falha na execução de %s no processo filho:\n%s' %
+                           (function.__name__, result['error'].encode('utf-8')))
+    return result
+
+
+def git_revision():
+    """Commit atual do repositório, ou None fora de um repositório git."""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=package_folder).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def render_template(template, project, class_ids):
+    """Renderiza o template uma vez para cada ID de classe, ou uma única vez com o ID None."""
+    for class_id in class_ids:
+        template.render(project, project.classes[class_id] if class_id is not None else None)
+
+
+def run(xml_file, config):
+    """Mede as etapas da geração para o modelo do arquivo XML, retornando um dicionário de resultados por etapa."""
+    logger = logging.getLogger('benchmark')
+    results = dict()
+
+    logger.info(u'Medindo a leitura do projeto.')
+    results['from_xml'] = measure(Project.from_xml, xml_file)
+
+    # A conexão é medida sobre um projeto já montado, conectando as classes novamente a partir da árvore XML.
+    logger.info(u'Medindo a conexão das classes.')
+    xmlobj = stream_xml(xml_file)
+    project = Project(xmlobj)
+    results['connect'] = measure(project.classes.connect, xmlobj)
+    del project, xmlobj
+
+    # Os templates são compilados antes das medições, que passam a considerar apenas a renderização.
+    generator = Generator(xml_file, config)
+    scaffold_folder = config.scaffold_folder
+    templates = dict()
+    for source_file, _, is_template, class_id in generator.scaffold_files(scaffold_folder, config.scaffold,
+                                                                          config.template_extension):
+        if is_template:
+            templates.setdefault(source_file, list()).append(class_id)
+
+    results['templates'] = dict()
+    for source_file, class_ids in sorted(templates.items()):
+        name = relpath(source_file, scaffold_folder)
+        logger.info(u'Medindo o template "%s".' % name)
+        template = Template(source_file, config, name)
+        render_template(template, generator.project, class_ids[:1])
+        results['templates'][name] = measure(render_template, template, generator.project, class_ids)
+        results['templates'][name]['renders'] = len(class_ids)
+
+    logger.info(u'Medindo a geração completa.')
+    results['generate'] = measure(generator.generate)
+    return results
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)-10s %(levelname)s %(message)s')
+    logging.getLogger('render').setLevel(logging.WARNING)
+    logging.getLogger('generator').setLevel(logging.WARNING)
+    logging.getLogger('manifest').setLevel(logging.WARNING)
+    parametros_script = docopt(__doc__)
+    parameters = {'classes': int(parametros_script['--classes']),
+                  'attributes': int(parametros_script['--attributes']),
+                  'associations': int(parametros_script['--associations']),
+                  'depth': int(parametros_script['--depth']),
+                  'tagged_values': int(parametros_script['--tagged-values'])}
+
+    xml_file = join(tempfile.mkdtemp(), 'synthetic.xml')
+    write_model(xml_file, **parameters)
+
+    # O cache de projetos é desligado para que a leitura do XML seja sempre medida.
+    config = Config.load(join(package_folder, 'config.yml'), model_cache=None)
+    results = run(xml_file, config)
+    os.remove(xml_file)
+
+    report = {'revision': git_revision(),
+              'python': platform.python_version(),
+              'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'parameters': parameters,
+              'results': results}
+    with open(parametros_script['--output'], 'w') as rf:
+        json.dump(report, rf, indent=1, sort_keys=True)
+
+    for phase in ('from_xml', 'connect', 'generate'):
+        print('%-50s %8.3fs %8.1f MiB' % (phase, results[phase]['seconds'], results[phase]['peak_mib']))
+    for name, result in sorted(results['templates'].items()):
+        print('%-50s %8.3fs %8.1f MiB' % (name, result['seconds'], result['peak_mib']))
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Gera um XML sintético no formato exportado pelo Visual Paradigm, para os benchmarks.
+
+Usage:
+    synthetic.py
+    [--classes N]
+    [--attributes N]
+    [--associations N]
+    [--depth N]
+    [--tagged-values N]
+    SAIDA
+
+Arguments:
+    SAIDA                     Arquivo XML a ser gerado.
+
+Options:
+    --classes N               Quantidade de classes [default: 500].
+    --attributes N            Quantidade de atributos por classe [default: 8].
+    --associations N          Quantidade de associações partindo de cada classe [default: 2].
+    --depth N                 Profundidade das hierarquias de generalização; 0 para não haver herança [default: 0].
+    --tagged-values N         Quantidade de tagged values por atributo, além da chave primária [default: 3].
+"""
+
+import random
+from xml.sax.saxutils import quoteattr
+from docopt import docopt
+
+
+def tagged_value(tv_id, name, value, tv_type=None):
+    """Código XML de um tagged value."""
+    return '<TaggedValue Id=%s Name=%s Value=%s%s/>' % (quoteattr(tv_id), quoteattr(name), quoteattr(value),
+                                                         ' Type=%s' % quoteattr(tv_type) if tv_type else '')
+
+
+def attribute_tagged_values(class_index, attribute_index, count):
+    """Código XML dos tagged values de um atributo comum.
+
+    Os primeiros são os usados pelos templates (título, widget e parâmetro do widget); os demais são informativos."""
+    prefix = 'C%d_A%d' % (class_index, attribute_index)
+    tagged_values = [tagged_value(prefix + '_title', 'title', 'Campo %d' % attribute_index),
+                     tagged_value(prefix + '_widget', 'widget', 'TextInputWidget'),
+                     tagged_value(prefix + '_size', 'widget:size', '40')][:count]
+    for i in range(len(tagged_values), count):
+        tagged_values.append(tagged_value('%s_nota%d' % (prefix, i), 'nota%d' % i, 'Nota %d' % i))
+    return ''.join(tagged_values)
+
+
+def write_model(xml_file, classes=500, attributes=8, associations=2, depth=0, tagged_values=3, seed=0):
+    """Escreve um modelo sintético no arquivo informado.
+
+    As classes ímpares são view classes, e cada classe se associa a classes definidas antes dela, de forma que o modelo
+    não tem ciclos. Com 'depth' maior que zero, as classes formam cadeias de generalização com essa profundidade, em
+    que cada classe herda da anterior. O gerador de números aleatórios usa uma semente fixa, para que o modelo seja
+    sempre o mesmo."""
+    rand = random.Random(seed)
+    relationships = list()
+    generalizations = list()
+
+    with open(xml_file, 'w') as xf:
+        xf.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        xf.write('<Project Author="benchmark" Name="synthetic" Xml_structure="simple">\n')
+        xf.write('<ProjectInfo/>\n<Models>\n')
+
+        for c in range(classes):
+            xf.write('<Class Id="C%d" Name="Classe%d">\n' % (c, c))
+            xf.write('<Stereotypes>%s</Stereotypes>\n' %
+                     ('<Stereotype Idref="view_class" Name="view_class"/>' if c % 2 else ''))
+            xf.write('<TaggedValues><TaggedValueContainer>%s%s</TaggedValueContainer></TaggedValues>\n' %
+                     (tagged_value('C%d_tablename' % c, 'tablename', 'tabela%d' % c),
+                      tagged_value('C%d_title' % c, 'title', 'Classe %d' % c)))
+
+            xf.write('<ModelChildren>\n')
+            xf.write('<Attribute Id="C%d_A0" Name="id" Type="Integer"><TaggedValues><TaggedValueContainer>%s'
+                     '</TaggedValueContainer></TaggedValues></Attribute>\n' %
+                     (c, tagged_value('C%d_A0_pk' % c, 'primary_key', 'True', 'Boolean')))
+            for a in range(1, attributes):
+                xf.write('<Attribute Id="C%d_A%d" Name="campo%d" Type="String(50)"><TaggedValues>'
+                         '<TaggedValueContainer>%s</TaggedValueContainer></TaggedValues></Attribute>\n' %
+                         (c, a, a, attribute_tagged_values(c, a, tagged_values)))
+            xf.write('</ModelChildren>\n</Class>\n')
+
+            # Generalização a partir da classe anterior da mesma cadeia.
+            if depth and c % (depth + 1):
+                generalizations.append((c - 1, c))
+
+            # Associações para classes anteriores.
+            for target in sorted(set(rand.randrange(c) for _ in range(associations))) if c else []:
+                relationships.append((c, target))
+
+        xf.write('<ModelRelationshipContainer Id="R0" Name="relationships"><ModelChildren>\n')
+        if generalizations:
+            xf.write('<ModelRelationshipContainer Id="R2" Name="Generalization"><ModelChildren>\n')
+            for i, (parent, child) in enumerate(generalizations):
+                xf.write('<Generalization Id="G%d" From="C%d" To="C%d"/>\n' % (i, parent, child))
+            xf.write('</ModelChildren></ModelRelationshipContainer>\n')
+        xf.write('<ModelRelationshipContainer Id="R1" Name="Association"><ModelChildren>\n')
+        for i, (origin, target) in enumerate(relationships):
+            xf.write('<Association Id="AS%d" Name="classe%d_%d" EndRelationshipFromMetaModelElement="C%d" '
+                     'EndRelationshipToMetaModelElement="C%d"><TaggedValues><TaggedValueContainer>%s'
+                     '</TaggedValueContainer></TaggedValues></Association>\n' %
+                     (i, target, i, origin, target, tagged_value('AS%d_title' % i, 'title', 'Classe %d' % target)))
+        xf.write('</ModelChildren></ModelRelationshipContainer>\n')
+        xf.write('</ModelChildren></ModelRelationshipContainer>\n')
+
+        xf.write('</Models>\n<Diagrams>\n<ClassDiagram Id="D0" Name="Diagrama"><Shapes>\n')
+        for c in range(classes):
+            xf.write('<Class Id="S%d" MetaModelElement="C%d" X="%d" Y="%d" Width="120" Height="80"/>\n' %
+                     (c, c, rand.randrange(5000), rand.randrange(5000)))
+        xf.write('</Shapes></ClassDiagram>\n</Diagrams>\n</Project>\n')
+
+
+if __name__ == '__main__':
+    parametros_script = docopt(__doc__)
+    write_model(parametros_script['SAIDA'],
+                classes=int(parametros_script['--classes']),
+                attributes=int(parametros_script['--attributes']),
+                associations=int(parametros_script['--associations']),
+                depth=int(parametros_script['--depth']),
+                tagged_values=int(parametros_script['--tagged-values']))
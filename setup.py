@@ -16,6 +16,8 @@ requires = [
     'chameleon',
     'lxml',
     'docopt',
+    'PyYAML',
+    'deform',
 ]
 
 setup(name='py2fmw',
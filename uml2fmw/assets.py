@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo de montagem dos arquivos estáticos da aplicação gerada.
+
+    Os scripts e folhas de estilo carregados pelas páginas são juntados em pacotes (bundles), os de BUNDLES ou os da
+    opção 'assets' da configuração, e minificados. Cada pacote recebe no nome o hash do seu conteúdo
+    ('app.3f2a9c1b7d4e.js'), podendo ser guardado pelos navegadores indefinidamente, e é gravado também comprimido com
+    gzip, para ser servido sem compressão a cada requisição. O arquivo 'manifest.json' liga o nome de cada pacote ao
+    nome com o hash, e é lido pela aplicação gerada para montar as URLs.
+
+    As origens são caminhos relativos à pasta do módulo do scaffold ('static/custom.css') ou recursos de outros pacotes
+    python no formato 'pacote:caminho' ('deform:static/css/form.css'). As URLs relativas das folhas de estilo são
+    reescritas para continuar apontando para os mesmos arquivos a partir da pasta dos pacotes, supondo que a pasta
+    'static' de cada pacote python é servida com o nome do pacote, como o 'deform' no 'routes.py' do scaffold.
+"""
+
+import re
+import gzip
+import json
+import logging
+import posixpath
+from io import BytesIO
+from hashlib import sha1
+from os.path import join, exists, splitext
+from collections import OrderedDict
+logger = logging.getLogger('assets')
+
+# Pasta dos pacotes na aplicação gerada, relativa à pasta do módulo, e URL de onde são servidos.
+ASSETS_FOLDER = 'assets'
+ASSETS_URL = 'assets/'
+
+# Nome do arquivo que liga os nomes dos pacotes aos nomes com o hash do conteúdo.
+MANIFEST = 'manifest.json'
+
+# Pacotes padrão, usados quando a opção 'assets' não é informada. Os templates do scaffold carregam exatamente estes
+# pacotes, com request.asset_url, de forma que a opção pode mudar as origens, mas não os nomes.
+BUNDLES = OrderedDict([
+    ('app.js', [
+        'deform:static/scripts/jquery-2.0.3.min.js',
+        'deform:static/scripts/bootstrap.min.js',
+        'deform:static/scripts/deform.js',
+        'deform:static/scripts/typeahead.min.js',
+        'deform:static/scripts/jquery.form-3.09.js',
+        'deform:static/scripts/jquery.maskedinput-1.3.1.min.js',
+        'deform:static/scripts/modernizr.custom.input-types-and-atts.js',
+    ]),
+    ('app.css', [
+        'deform:static/css/form.css',
+        'deform:static/css/typeahead.css',
+        'deform:static/css/bootstrap.min.css',
+        'static/custom.css',
+    ]),
+])
+
+# URLs nas folhas de estilo, exceto as absolutas e as de dados.
+css_url = re.compile(r'''url\(\s*(['"]?)(?![a-z]+:|/|#|data:)([^'")]+)\1\s*\)''', re.IGNORECASE)
+
+
+def resolve(source, package_folder):
+    """Arquivo e URL de uma origem, relativa à pasta do módulo do scaffold ou no formato 'pacote:caminho'.
+
+    Lança ValueError caso o pacote da origem não esteja instalado."""
+    if ':' in source:
+        package, path = source.split(':', 1)
+        import pkg_resources
+        try:
+            filename = pkg_resources.resource_filename(package, path)
+        except ImportError:
+            raise ValueError('Pacote "%s" da origem "%s" não instalado. Instale o pacote ou altere as origens na opção '
+                             '"assets".' % (package, source))
+        parts = path.split('/')
+        url = '/'.join([package] + (parts[1:] if parts[0] == 'static' else parts))
+        return filename, url
+    return join(package_folder, *source.split('/')), source
+
+
+def rewrite_css_urls(code, source_url):
+    """Reescreve as URLs relativas da folha de estilo servida em 'source_url' para a pasta dos pacotes."""
+    source_folder = posixpath.dirname(source_url)
+
+    def rewrite(match):
+        path, suffix = re.match(r'([^?#]*)(.*)', match.group(2)).groups()
+        target = posixpath.normpath(posixpath.join(source_folder, path))
+        return 'url(%s%s)' % (posixpath.relpath(target, ASSETS_URL.rstrip('/')), suffix)
+
+    return css_url.sub(rewrite, code)
+
+
+def minify_css(code):
+    """Minifica a folha de estilo, com o rcssmin quando instalado, ou removendo comentários e espaços."""
+    try:
+        from rcssmin import cssmin
+        return cssmin(code)
+    except ImportError:
+        code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
+        code = re.sub(r'\s+', ' ', code)
+        code = re.sub(r'\s*([{};,>])\s*', r'\1', code)
+        return code.replace(';}', '}').strip()
+
+
+def minify_js(code, source):
+    """Minifica o script com o rjsmin, quando instalado. Sem ele, apenas os scripts já minificados são reduzidos."""
+    if source.endswith('.min.js'):
+        return code.strip()
+    try:
+        from rjsmin import jsmin
+        return jsmin(code)
+    except ImportError:
+        logger.debug(u'rjsmin não instalado, "%s" não será minificado.' % source)
+        return code
+
+
+def compress(content):
+    """Conteúdo comprimido com gzip, sem data nem nome no cabeçalho, de forma que o resultado seja sempre o mesmo."""
+    buf = BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=9, mtime=0) as gz:
+        gz.write(content)
+    return buf.getvalue()
+
+
+class AssetBuilder(object):
+    """Montador dos pacotes definidos em 'bundles' ({nome do pacote: [origens]}), a partir da pasta do módulo do
+    scaffold.
+
+    Os pacotes devem ser os mesmos de BUNDLES, carregados pelos templates do scaffold. Lança ValueError caso falte
+    algum deles ou haja pacotes que os templates não carregam."""
+
+    def __init__(self, bundles, package_folder):
+        missing = sorted(set(BUNDLES) - set(bundles))
+        unknown = sorted(set(bundles) - set(BUNDLES))
+        if missing or unknown:
+            raise ValueError('Pacotes de arquivos estáticos inválidos na opção "assets". Os templates carregam '
+                             'apenas %s. Faltando: %s. Desconhecidos: %s.' %
+                             (', '.join(sorted(BUNDLES)), ', '.join(missing) or 'nenhum',
+                              ', '.join(unknown) or 'nenhum'))
+        self.bundles = OrderedDict(sorted(bundles.items()))
+        self.package_folder = package_folder
+        self.__sources = None
+
+    def sources(self):
+        """Origens de cada pacote como (pacote, origem, arquivo, URL), ignorando as que não existem."""
+        if self.__sources is None:
+            self.__sources = []
+            for bundle, sources in self.bundles.items():
+                for source in sources:
+                    filename, url = resolve(source, self.package_folder)
+                    if not exists(filename):
+                        logger.warning(u'Origem "%s" do pacote "%s" não encontrada.' % (source, bundle))
+                        continue
+                    self.__sources.append((bundle, source, filename, url))
+        return self.__sources
+
+    def digest(self):
+        """Hash das definições e do conteúdo das origens, que muda sempre que os pacotes precisam ser montados."""
+        sha = sha1(repr(self.bundles.items()))
+        for _, __, filename, ___ in self.sources():
+            with open(filename, 'rb') as sf:
+                sha.update(sf.read())
+        return sha.hexdigest()
+
+    def build(self):
+        """Monta os pacotes, retornando {arquivo relativo à pasta dos pacotes: conteúdo}, com o manifesto."""
+        contents = OrderedDict((bundle, list()) for bundle in self.bundles)
+        for bundle, source, filename, url in self.sources():
+            with open(filename, 'rb') as sf:
+                code = sf.read().decode('utf-8')
+            if bundle.endswith('.css'):
+                code = minify_css(rewrite_css_urls(code, url))
+            else:
+                code = minify_js(code, source)
+            contents[bundle].append(code)
+
+        files = OrderedDict()
+        manifest = OrderedDict()
+        for bundle, codes in contents.items():
+            # Os scripts são separados por ';', pois nem todos terminam com ele.
+            content = (u';\n' if bundle.endswith('.js') else u'\n').join(codes).encode('utf-8')
+            name, extension = splitext(bundle)
+            fingerprinted = '%s.%s%s' % (name, sha1(content).hexdigest()[:12], extension)
+            files[fingerprinted] = content
+            files[fingerprinted + '.gz'] = compress(content)
+            manifest[bundle] = fingerprinted
+            logger.info(u'Pacote "%s" montado com %d arquivos: %d bytes, %d com gzip.' %
+                        (fingerprinted, len(codes), len(content), len(files[fingerprinted + '.gz'])))
+
+        files[MANIFEST] = json.dumps(manifest, indent=1, separators=(',', ': '), sort_keys=True).encode('utf-8')
+        return files
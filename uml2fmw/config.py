@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo da configuração do gerador.
+
+    O arquivo 'config.yml' é lido uma única vez, e os valores podem ser sobrescritos pela linha de comando antes de a
+    configuração ser passada ao gerador. Os caminhos relativos são resolvidos a partir da pasta do arquivo de
+    configuração, e não da pasta corrente no momento da importação dos módulos.
+"""
+
+import yaml
+from os.path import join, abspath, dirname
+from models.database import DatabaseProfile
+
+
+class Config(object):
+    """Configuração do gerador.
+
+    Cada opção tem um tipo, usado para converter os valores informados como texto na linha de comando."""
+
+    # Opções aceitas, com o tipo e o valor padrão de cada uma.
+    options = {
+        'scaffold': (str, 'pyramid_1_7'),
+        'basepath': (str, 'uml2pyramid'),
+        'template_extension': (str, 'u2p'),
+        'template_cache': (str, None),
+        'model_cache': (str, None),
+        'model_cache_size': (int, 256),
+        'assets': (dict, None),
+    }
+
+    # Tipos das opções que não podem ser convertidas a partir de um texto da linha de comando.
+    structured_types = (dict, list)
+
+    # Opções do perfil de banco de dados, como 'db_pool_size', que sobrescrevem os tagged values do projeto. Ficam sem
+    # valor padrão, para que apenas as informadas sejam aplicadas.
+    options.update((DatabaseProfile.prefix + name, (option_type, None))
+                   for name, (option_type, _) in DatabaseProfile.options.items())
+
+    def __init__(self, base_folder, **values):
+        self.base_folder = base_folder
+        for name, (_, default) in self.options.items():
+            setattr(self, name, default)
+        self.update(**values)
+
+    @classmethod
+    def load(cls, configfile='config.yml', **overrides):
+        """Lê o arquivo de configuração, aplicando os valores informados por cima dos lidos."""
+        configfile = abspath(configfile)
+        with open(configfile) as cf:
+            values = yaml.safe_load(cf) or dict()
+        config = cls(dirname(configfile), **values)
+        config.update(**overrides)
+        return config
+
+    def update(self, **values):
+        """Altera as opções informadas, convertendo os valores para o tipo de cada opção."""
+        for name, value in values.items():
+            if name not in self.options:
+                raise ValueError('Opção de configuração desconhecida: "%s".' % name)
+            option_type = self.options[name][0]
+            setattr(self, name, option_type(value) if value not in (None, '') else None)
+
+    def set(self, assignment):
+        """Altera uma opção a partir de um texto no formato 'opção=valor', como informado na linha de comando.
+
+        Apenas opções de valor simples podem ser alteradas assim; as estruturadas, como 'assets', ficam no arquivo."""
+        name, separator, value = assignment.partition('=')
+        if not separator:
+            raise ValueError('Opção de configuração inválida: "%s". Use o formato opção=valor.' % assignment)
+        name = name.strip()
+        if name in self.options and self.options[name][0] in self.structured_types:
+            raise ValueError('A opção "%s" não pode ser informada na linha de comando. Altere-a no arquivo de '
+                             'configuração.' % name)
+        self.update(**{name: value.strip()})
+
+    def path(self, *parts):
+        """Caminho a partir da pasta do arquivo de configuração."""
+        return join(self.base_folder, *parts)
+
+    def database_overrides(self):
+        """Opções do perfil de banco de dados informadas na configuração, sem o prefixo: {'pool_size': 20}."""
+        prefix = DatabaseProfile.prefix
+        return {name: getattr(self, prefix + name) for name in DatabaseProfile.options
+                if getattr(self, prefix + name) is not None}
+
+    @property
+    def scaffold_folder(self):
+        """Pasta do scaffold utilizado na geração."""
+        return self.path('scaffolds', self.scaffold)
+
+    def generated_folder(self, project_name):
+        """Pasta da aplicação gerada para o projeto."""
+        return self.path('generated', project_name)
@@ -7,92 +7,469 @@
 """
 
 import os
-import glob
 import logging
-from distutils.dir_util import copy_tree
-from chameleon import PageTemplate
+from hashlib import sha1
+from collections import defaultdict
 from shutil import rmtree
-from os import walk, remove, rename
-from os.path import join, exists
-from gentle.util import read_yaml, short_dir
+from os import walk, makedirs, listdir
+from os.path import join, exists, relpath, basename, dirname, sep
+from gentle.util import short_dir
 from models.project import Project
+from models.snapshot import SnapshotCache
+from models.profiling import profiler
+from manifest import Manifest, digest
+from assets import AssetBuilder, ASSETS_FOLDER, MANIFEST, BUNDLES
+from staging import Staging
 
-here = os.getcwd()
-configfile = os.path.join(here, 'config.yml')
-basepath = read_yaml(configfile, 'basepath')
+# Marcadores que, no nome de um template, indicam que ele é renderizado uma vez para cada classe ou view class.
+class_marker = '__classe__'
+view_class_marker = '__view_class__'
+
+# Gerador compartilhado com os processos de renderização paralela.
+worker_generator = None
+
+# Templates já compilados no processo, por nome do template: {nome: (hash do conteúdo, template)}.
+compiled_templates = dict()
 
 
 class Generator(object):
-    """Classe geradora de código."""
-    def __init__(self, xml_file):
-        self.project = Project.from_xml(xml_file)
+    """Classe geradora de código, a partir do arquivo XML e da configuração (Config) informados."""
+    def __init__(self, xml_file, config):
+        self.xml_file = xml_file
+        self.config = config
+        self.cache = SnapshotCache(config.path(config.model_cache), config.model_cache_size) \
+            if config.model_cache else None
+        self.project = self.load_project()
+
+    def load_project(self):
+        """Lê o projeto do arquivo XML, aplicando as opções de banco de dados informadas na configuração.
+
+        As opções alteram também o hash do projeto, de forma que a geração incremental renderize novamente os templates
+        quando elas mudam."""
+        project = Project.from_xml(self.xml_file, cache=self.cache)
+        overrides = self.config.database_overrides()
+        if overrides:
+            project.database.update(**overrides)
+            project.digest = digest(project.digest, repr(sorted(overrides.items())))
+        return project
+
+    @property
+    def scaffold_folder(self):
+        """Pasta do scaffold utilizado na geração."""
+        return self.config.scaffold_folder
+
+    def reload(self):
+        """Lê novamente o arquivo XML, trocando o projeto apenas se o modelo mudou.
+
+        Retorna True caso o modelo tenha mudado. Mudanças apenas nos diagramas não alteram o projeto."""
+        logger = logging.getLogger('generator')
+        project = self.load_project()
+        if project.digest == self.project.digest:
+            return False
+
+        logger.info(u'Modelo alterado, atualizando o projeto.')
+        self.project = project
+        return True
+
+    def generate(self, incremental=False, jobs=1):
+        """Gera o código da aplicação Pyramid a partir do XML.
 
-    def generate(self):
-        """Gera o código da aplicação Pyramid a partir do XML."""
+        No modo incremental, caso a aplicação já tenha sido gerada antes, apenas os arquivos cuja origem mudou são
+        copiados ou renderizados novamente. Com 'jobs' maior que 1, os templates são renderizados em paralelo.
+
+        Os templates são renderizados em memória a partir do scaffold, e os arquivos que mudaram são preparados numa
+        pasta temporária antes de serem movidos para a aplicação (ver Staging)."""
         # Instancia o logger.
         logger = logging.getLogger('generator')
 
         # Lê o scaffold a ser utilizado e mapeia as pastas de origem e destino da cópia.
-        scaffold = read_yaml(configfile, 'scaffold')
-        from_folder = join(here, 'scaffolds', scaffold)
-        to_folder = join(here, 'generated', self.project.name)
-
-        # Caso o diretório destino já exista, exclui.
-        if exists(to_folder):
-            logger.info(u'Excluindo pasta "%s"' % short_dir(to_folder, basepath))
-            rmtree(to_folder)
-
-        # Faz a cópia de todos os arquivos na pasta de templates para a pasta de destino.
-        logger.info(u'Copiando arquivos de "%s" para "%s"' % (short_dir(from_folder, basepath),
-                                                              short_dir(to_folder, basepath)))
-        copy_tree(from_folder, to_folder)
-
-        # Renomeia a pasta do módulo.
-        template_module = join(to_folder, scaffold)
-        generated_module = join(to_folder, self.project.name)
-        logger.info(u'Renomeando "%s" para "%s"' % (short_dir(template_module, basepath),
-                                                    short_dir(generated_module, basepath)))
-        rename(template_module, generated_module)
-
-        # Mapeia os templates nas pastas copiadas, usando-os como chave para os arquivos de código python.
-        template_extension = read_yaml(configfile, 'template_extension')
-        templates_and_genfiles = {tf: tf.replace('.%s' % template_extension, '') for root, _, __ in walk(join(to_folder))
-                                  for tf in glob.glob(join(root, '*.%s' % template_extension))}
+        basepath = self.config.basepath
+        scaffold = self.config.scaffold
+        template_extension = self.config.template_extension
+        from_folder = self.config.scaffold_folder
+        to_folder = self.config.generated_folder(self.project.name)
+
+        # Havendo o manifesto de uma geração anterior, atualiza apenas o que mudou.
+        if incremental:
+            manifest = Manifest(to_folder)
+            if manifest.exists:
+                return self.update(from_folder, to_folder, scaffold, template_extension, manifest, jobs)
+            logger.info(u'Manifesto não encontrado em "%s", gerando a aplicação completa.' %
+                        short_dir(to_folder, basepath))
+
+        # Mapeia os arquivos do scaffold e os arquivos gerados a partir deles.
+        scaffold_files = self.scaffold_files(from_folder, scaffold, template_extension)
+        templates = [(source_file, genfile, class_id)
+                     for source_file, genfile, is_template, class_id in scaffold_files if is_template]
 
         # Dicionário de arquivos python e seus respectivos códigos.
         genfiles_and_codes = dict()
 
-        # Faz a renderização dos templates.
+        # Faz a renderização dos templates diretamente do scaffold, em memória.
         logger.info(u'Iniciando renderiação dos templates.')
-        for template_file, python_file in templates_and_genfiles.items():
-            # Gera o código a partir do template e adiciona ao dicionário de arquivos python e códigos.
-            code = Template(template_file).render(self.project)
-            genfiles_and_codes[python_file] = code
+        codes = self.render_all([(source_file, relpath(source_file, from_folder), class_id)
+                                 for source_file, _, class_id in templates], jobs)
+        contents = dict()
+        for (source_file, genfile, _), code in zip(templates, codes):
+            genfiles_and_codes[join(to_folder, genfile)] = code
+            contents[genfile] = code.encode('utf-8')
+        logger.info(u'Templates renderizados com sucesso.')
+        self.report_indexes()
 
-            # Escreve o código num arquivo.
-            with open(python_file, 'w') as pf:
-                pf.write(code.encode('utf-8'))
+        # Monta os pacotes de arquivos estáticos, gravados junto com os arquivos do scaffold.
+        builder = self.asset_builder()
+        assets = self.build_assets(builder)
 
-            # Exlui o arquivo do template na pasta de destino.
-            remove(template_file)
-        logger.info(u'Templates renderizados com sucesso.')
+        # Prepara os arquivos que mudaram e só então os move para a aplicação, que nunca fica gerada pela metade.
+        logger.info(u'Gravando arquivos de "%s" em "%s"' % (short_dir(from_folder, basepath),
+                                                           short_dir(to_folder, basepath)))
+        staging = Staging(to_folder)
+        manifest = Manifest(to_folder)
+        try:
+            for source_file, genfile, is_template, _ in scaffold_files:
+                with profiler.phase('template.write:%s' % relpath(source_file, from_folder)):
+                    if is_template:
+                        staging.write(genfile, contents[genfile])
+                    else:
+                        staging.copy(source_file, genfile)
+            for genfile, content in assets:
+                staging.write(genfile, content)
+
+            # Exclui os arquivos da geração anterior que não foram gerados agora. Os demais arquivos da pasta, como o
+            # banco de dados de desenvolvimento, são mantidos.
+            genfiles = set(genfile for _, genfile, __, ___ in scaffold_files) | set(genfile for genfile, _ in assets)
+            for genfile in staging.prune(genfiles, manifest.files):
+                logger.info(u'Excluindo "%s"' % genfile)
+            written = staging.commit()
+        except Exception:
+            staging.discard()
+            raise
+        profiler.count('files_written', written)
+
+        # Registra os arquivos gerados no manifesto, para as próximas gerações incrementais.
+        manifest.files = dict()
+        for source_file, genfile, is_template, class_id in scaffold_files:
+            with open(source_file, 'rb') as sf:
+                source_code = sf.read()
+            if is_template:
+                manifest.record(genfile, self.template_digest(source_code, class_id), digest(contents[genfile]))
+            else:
+                manifest.record(genfile, digest(source_code), digest(source_code))
+        assets_digest = builder.digest()
+        for genfile, content in assets:
+            manifest.record(genfile, assets_digest, digest(content))
+        manifest.model = self.project.digest
+        manifest.save()
+
+        return genfiles_and_codes
+
+    def template_digest(self, source_code, class_id=None):
+        """Hash da origem de um arquivo renderizado: o código do template e o modelo.
+
+        Os templates renderizados uma vez por classe dependem apenas da parte do modelo ligada à classe (ver
+        Project.class_digest). Os demais dependem do modelo inteiro."""
+        if class_id is None:
+            return digest(source_code, self.project.digest)
+        return digest(source_code, self.project.class_digest(self.project.classes[class_id]))
+
+    def asset_builder(self):
+        """Montador dos pacotes de arquivos estáticos definidos na opção 'assets', ou dos pacotes padrão caso a opção
+        não seja informada. Os pacotes são sempre montados, pois os templates do scaffold dependem deles."""
+        return AssetBuilder(self.config.assets or BUNDLES, join(self.config.scaffold_folder, self.config.scaffold))
+
+    def build_assets(self, builder):
+        """Monta os pacotes de arquivos estáticos, retornando tuplas (arquivo gerado, conteúdo).
+
+        Os pacotes ficam na pasta 'assets' do módulo da aplicação, com o manifesto que liga cada pacote ao nome com o
+        hash do conteúdo."""
+        logger = logging.getLogger('generator')
+        logger.info(u'Montando os pacotes de arquivos estáticos.')
+        with profiler.phase('assets.build'):
+            files = builder.build()
+        return [(join(self.project.name, ASSETS_FOLDER, name), content) for name, content in files.items()]
+
+    def report_indexes(self):
+        """Informa os índices e restrições de unicidade criados nas tabelas, com os nomes dados pelo NAMING_CONVENTION.
+
+        Índices compostos com colunas que não existem na classe são apontados, pois não são gerados."""
+        logger = logging.getLogger('indexes')
+        count = 0
+        for classe in self.project.classes:
+            for index in classe.indexes:
+                logger.info(u'Índice %s.' % index)
+                count += 1
+
+            columns = set(attribute.name for attribute in classe.column_attributes)
+            for index in classe.declared_indexes:
+                missing = [column for column in index.columns if column not in columns]
+                if missing:
+                    logger.warning(u'Índice "%s" da classe "%s" ignorado, com colunas inexistentes: %s.' %
+                                   (index.name, classe.name, u', '.join(missing)))
+        logger.info(u'%d índices e restrições de unicidade nas tabelas.' % count)
+
+    def update(self, from_folder, to_folder, scaffold, template_extension, manifest, jobs=1):
+        """Atualiza uma aplicação já gerada, reescrevendo apenas os arquivos que mudaram.
+
+        Arquivos estáticos só são copiados quando mudam no scaffold, e templates só são renderizados quando o template
+        ou o modelo mudam. Um arquivo renderizado com o mesmo conteúdo do anterior não é reescrito, mantendo a data de
+        modificação. Arquivos que deixaram de existir no scaffold são excluídos."""
+        # Instancia o logger.
+        logger = logging.getLogger('generator')
+        basepath = self.config.basepath
+        logger.info(u'Atualizando "%s" de forma incremental.' % short_dir(to_folder, basepath))
+        if manifest.model != self.project.digest:
+            logger.info(u'O modelo foi alterado desde a última geração.')
+            self.report_indexes()
+
+        # Dicionário de arquivos python e seus respectivos códigos.
+        genfiles_and_codes = dict()
+        genfiles = set()
+        pending_templates = list()
+
+        # Os arquivos que mudaram são preparados fora da aplicação e registrados no manifesto depois de movidos.
+        staging = Staging(to_folder)
+        records = list()
+        try:
+            for source_file, genfile, is_template, class_id in self.scaffold_files(from_folder, scaffold,
+                                                                                   template_extension):
+                genfiles.add(genfile)
+                with open(source_file, 'rb') as sf:
+                    source_code = sf.read()
+
+                if is_template:
+                    # O template depende do próprio código e da parte do modelo que ele usa.
+                    source_digest = self.template_digest(source_code, class_id)
+                    if not manifest.is_current(genfile, source_digest):
+                        pending_templates.append((source_file, genfile, class_id, source_digest))
+                else:
+                    source_digest = digest(source_code)
+                    if manifest.is_current(genfile, source_digest):
+                        continue
+
+                    logger.info(u'Copiando "%s"' % short_dir(source_file, basepath))
+                    staging.copy(source_file, genfile)
+                    records.append((genfile, source_digest, source_digest))
+
+            # Monta os pacotes de arquivos estáticos apenas se as definições ou as origens mudaram. Do contrário, os
+            # pacotes já gerados são mantidos.
+            builder = self.asset_builder()
+            assets_digest = builder.digest()
+            assets_folder = join(self.project.name, ASSETS_FOLDER)
+            built = [genfile for genfile in manifest.files if dirname(genfile) == assets_folder]
+            if join(assets_folder, MANIFEST) in built and \
+                    all(manifest.is_current(genfile, assets_digest) for genfile in built):
+                genfiles.update(built)
+            else:
+                for genfile, content in self.build_assets(builder):
+                    genfiles.add(genfile)
+                    content_digest = digest(content)
+                    if not manifest.has_content(genfile, content_digest):
+                        logger.info(u'Escrevendo "%s"' % short_dir(join(to_folder, genfile), basepath))
+                        staging.write(genfile, content)
+                    records.append((genfile, assets_digest, content_digest))
+
+            # Renderiza os templates cuja origem mudou.
+            codes = self.render_all([(source_file, relpath(source_file, from_folder), class_id)
+                                     for source_file, _, class_id, __ in pending_templates], jobs)
+            for (source_file, genfile, _, source_digest), code in zip(pending_templates, codes):
+                genfiles_and_codes[join(to_folder, genfile)] = code
+                content = code.encode('utf-8')
+                content_digest = digest(content)
+
+                # Só escreve o arquivo se o código gerado for diferente do anterior.
+                if not manifest.has_content(genfile, content_digest):
+                    logger.info(u'Escrevendo "%s"' % short_dir(join(to_folder, genfile), basepath))
+                    with profiler.phase('template.write:%s' % relpath(source_file, from_folder)):
+                        staging.write(genfile, content)
+                records.append((genfile, source_digest, content_digest))
+
+            # Exclui os arquivos que não fazem mais parte do scaffold.
+            removed = staging.prune(genfiles, manifest.files)
+            for genfile in removed:
+                logger.info(u'Excluindo "%s"' % genfile)
+            written = staging.commit()
+        except Exception:
+            staging.discard()
+            raise
+        profiler.count('files_written', written)
+
+        for genfile, source_digest, content_digest in records:
+            manifest.record(genfile, source_digest, content_digest)
+
+        for genfile in set(manifest.files.keys()) - genfiles:
+            manifest.forget(genfile)
+
+        manifest.model = self.project.digest
+        manifest.save()
+        logger.info(u'Aplicação atualizada, %d templates renderizados.' % len(genfiles_and_codes))
 
         return genfiles_and_codes
 
+    def render_all(self, templates, jobs=1):
+        """Renderiza uma lista de tuplas (arquivo do template, nome do template, ID da classe), retornando os códigos
+        na mesma ordem. O ID da classe só é informado nos templates renderizados uma vez por classe.
+
+        Com 'jobs' maior que 1, os templates são divididos entre processos de trabalho criados por fork, que herdam o
+        projeto já carregado. O resultado não depende da quantidade de processos."""
+        global worker_generator
+
+        profiler.count('templates_rendered', len(templates))
+        if jobs <= 1 or len(templates) <= 1 or not hasattr(os, 'fork'):
+            worker_generator = self
+            try:
+                return [render_worker(template) for template in templates]
+            finally:
+                worker_generator = None
+
+        from multiprocessing import Pool
+
+        logger = logging.getLogger('generator')
+        jobs = min(jobs, len(templates))
+        logger.info(u'Renderizando %d templates em %d processos.' % (len(templates), jobs))
+
+        # O gerador é publicado no módulo antes da criação dos processos, para ser herdado por eles.
+        worker_generator = self
+        pool = Pool(jobs)
+        try:
+            # Os tempos de cada template são medidos nos processos de trabalho e não chegam ao relatório, apenas o
+            # total.
+            with profiler.phase('template.render_parallel'):
+                return pool.map(render_worker, templates, chunksize=max(1, len(templates) // (jobs * 4)))
+        finally:
+            pool.close()
+            pool.join()
+            worker_generator = None
+
+    def scaffold_files(self, from_folder, scaffold, template_extension):
+        """Lista os arquivos do scaffold com os caminhos relativos dos arquivos gerados a partir deles.
+
+        Retorna tuplas (arquivo do scaffold, arquivo gerado, indica se é template, ID da classe), com a pasta do módulo
+        já renomeada para o nome do projeto e a extensão dos templates removida. Os templates com marcador de classe no
+        nome aparecem uma vez para cada classe, com o marcador substituído pelo nome da classe em caixa baixa.
+
+        Lança ValueError caso dois arquivos gerados tenham o mesmo caminho, como uma classe 'Export' cujo módulo de
+        views substituiria o 'views/export.py' do scaffold."""
+        files = list()
+        # Origens de cada arquivo gerado, para apontar os conflitos de nomes: {arquivo gerado: [origens]}.
+        origins = defaultdict(list)
+
+        def add(source_file, genfile, is_template, classe=None):
+            origins[genfile].append(u'classe "%s"' % classe.name if classe is not None else
+                                    u'"%s"' % relpath(source_file, from_folder))
+            files.append((source_file, genfile, is_template, classe.id if classe is not None else None))
+
+        for root, _, filenames in walk(from_folder):
+            for filename in sorted(filenames):
+                source_file = join(root, filename)
+                parts = relpath(source_file, from_folder).split(sep)
+                if parts[0] == scaffold and len(parts) > 1:
+                    parts[0] = self.project.name
+                genfile = join(*parts)
+
+                is_template = filename.endswith('.%s' % template_extension)
+                if not is_template:
+                    add(source_file, genfile, False)
+                    continue
+
+                genfile = genfile[:-len('.%s' % template_extension)]
+                marked_classes = self.marked_classes(filename)
+                if marked_classes is None:
+                    add(source_file, genfile, True)
+                    continue
+
+                for classe in marked_classes:
+                    class_genfile = join(dirname(genfile), basename(genfile).replace(
+                        view_class_marker if view_class_marker in filename else class_marker, classe.lower_name))
+                    add(source_file, class_genfile, True, classe)
+
+        conflicts = sorted((genfile, sources) for genfile, sources in origins.items() if len(sources) > 1)
+        if conflicts:
+            raise ValueError(u'Arquivos gerados com o mesmo nome; renomeie as classes no modelo: %s.' % u'; '.join(
+                u'"%s" (%s)' % (genfile, u', '.join(sources)) for genfile, sources in conflicts))
+        return files
+
+    def marked_classes(self, filename):
+        """Classes para as quais o template é renderizado, conforme o marcador de classe no nome do arquivo.
+
+        Retorna None caso o nome do arquivo não tenha marcador."""
+        if view_class_marker in filename:
+            return self.project.classes.view_classes
+        elif class_marker in filename:
+            return self.project.classes
+        return None
+
+
+def render_worker(template):
+    """Renderiza um template usando o gerador publicado no módulo, herdado do processo principal pelos processos de
+    trabalho."""
+    template_file, name, class_id = template
+    project = worker_generator.project
+    classe = project.classes[class_id] if class_id is not None else None
+    return Template(template_file, worker_generator.config, name).render(project, classe)
+
 
 class Template(object):
     """Classe que representa um template."""
-    def __init__(self, template):
+    def __init__(self, template, config, name=None):
         self.__template = template
+        self.__name = name if name is not None else basename(template)
+        self.__config = config
 
-    def render(self, project):
-        """Gera a aplicação a partir do arquivo XML exportado de um modelo UML."""
+    def render(self, project, classe=None):
+        """Gera a aplicação a partir do arquivo XML exportado de um modelo UML.
+
+        Nos templates renderizados uma vez por classe, a classe da vez é informada em 'classe'."""
         # Instancia o logger.
         logger = logging.getLogger('render')
-        logger.info(u'Renderizando "%s"' % short_dir(self.__template, basepath))
+        logger.info(u'Renderizando "%s"' % short_dir(self.__template, self.__config.basepath))
 
         with open(self.__template) as tf:
             template_code = tf.read()
-        template = PageTemplate(template_code)
-        rendered = template(project=project)
+        template = self.compile(self.__name, template_code, self.__config)
+        with profiler.phase('template.render:%s' % self.__name):
+            rendered = template(project=project, classe=classe)
         return rendered
+
+    @staticmethod
+    def compile(name, template_code, config):
+        """Compila o código do template, reaproveitando as versões já compiladas.
+
+        O template compilado é mantido em memória e, caso a pasta 'template_cache' esteja configurada, também em disco,
+        identificado pelo nome do template e pelo hash do seu conteúdo."""
+        digest = sha1(template_code).hexdigest()
+        if name in compiled_templates and compiled_templates[name][0] == digest:
+            return compiled_templates[name][1]
+
+        # O chameleon só é importado quando algum template precisa ser compilado.
+        from chameleon import PageTemplate
+        with profiler.phase('template.compile:%s' % name):
+            loader = Template.loader(name, digest, config)
+            if loader is not None:
+                template = PageTemplate(template_code, loader=loader)
+            else:
+                template = PageTemplate(template_code)
+
+        compiled_templates[name] = (digest, template)
+        return template
+
+    @staticmethod
+    def loader(name, digest, config):
+        """Carregador de módulos do chameleon que guarda o template compilado na pasta de cache.
+
+        Cada template tem uma pasta própria no cache, nomeada pelo hash do nome completo do template, de forma que
+        caminhos diferentes nunca dividam a mesma pasta, com uma subpasta por hash de conteúdo. Quando o conteúdo do
+        template muda, as subpastas dos conteúdos anteriores são descartadas."""
+        if not config.template_cache:
+            return None
+
+        from chameleon.loader import ModuleLoader
+        template_folder = config.path(config.template_cache, sha1(name).hexdigest())
+        if exists(template_folder):
+            for old_digest in listdir(template_folder):
+                if old_digest != digest:
+                    rmtree(join(template_folder, old_digest))
+
+        cache_folder = join(template_folder, digest)
+        if not exists(cache_folder):
+            makedirs(cache_folder)
+        return ModuleLoader(cache_folder)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo do manifesto de geração.
+
+    O manifesto fica na pasta da aplicação gerada e registra, para cada arquivo gerado, o hash da sua origem (arquivo do
+    scaffold ou template mais o modelo) e o hash, o tamanho e a data de modificação do arquivo escrito. Com isso, a
+    geração incremental consegue saber quais arquivos precisam ser copiados ou renderizados novamente.
+"""
+
+import json
+import logging
+from hashlib import sha1
+from os import stat
+from os.path import join, exists
+
+
+def digest(*contents):
+    """Hash SHA-1 dos conteúdos informados."""
+    sha = sha1()
+    for content in contents:
+        sha.update(content)
+    return sha.hexdigest()
+
+
+class Manifest(object):
+    """Manifesto dos arquivos de uma aplicação gerada."""
+
+    filename = '.uml2fmw.json'
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = join(folder, self.filename)
+        self.model = None
+        self.files = dict()
+
+        if exists(self.path):
+            with open(self.path) as mf:
+                data = json.load(mf)
+            self.model = data.get('model')
+            self.files = data.get('files', dict())
+
+    @property
+    def exists(self):
+        """Indica se o manifesto já foi gravado na pasta da aplicação."""
+        return exists(self.path)
+
+    def is_current(self, genfile, source_digest):
+        """Indica se o arquivo foi gerado a partir da mesma origem e não foi alterado desde então."""
+        entry = self.files.get(genfile)
+        return entry is not None and entry['source'] == source_digest and self.is_untouched(genfile)
+
+    def is_untouched(self, genfile):
+        """Indica se o arquivo gerado continua com o tamanho e a data de modificação registrados."""
+        entry = self.files.get(genfile)
+        path = join(self.folder, genfile)
+        if entry is None or not exists(path):
+            return False
+
+        file_stat = stat(path)
+        return file_stat.st_size == entry['size'] and file_stat.st_mtime == entry['mtime']
+
+    def has_content(self, genfile, content_digest):
+        """Indica se o arquivo gerado já tem exatamente o conteúdo informado."""
+        entry = self.files.get(genfile)
+        return entry is not None and entry['digest'] == content_digest and self.is_untouched(genfile)
+
+    def record(self, genfile, source_digest, content_digest):
+        """Registra o arquivo gerado, guardando o estado atual dele no disco."""
+        file_stat = stat(join(self.folder, genfile))
+        self.files[genfile] = {'source': source_digest,
+                               'digest': content_digest,
+                               'size': file_stat.st_size,
+                               'mtime': file_stat.st_mtime}
+
+    def forget(self, genfile):
+        """Remove o arquivo do manifesto."""
+        self.files.pop(genfile, None)
+
+    def save(self):
+        """Grava o manifesto na pasta da aplicação."""
+        logger = logging.getLogger('manifest')
+        logger.info(u'Gravando manifesto com %d arquivos.' % len(self.files))
+        with open(self.path, 'w') as mf:
+            json.dump({'model': self.model, 'files': self.files}, mf, indent=1, sort_keys=True)
@@ -2,42 +2,35 @@
 """Módulo com definições de atributos de classes."""
 
 import logging
-from base import Base
+from base import Base, Cacheable, cached_property
 from gentle.base import OrderedDictBase
 from tagged_values import TaggedValues
 from stereotypes import Stereotypes
+from paths import children
 from collections import OrderedDict
-from relationships import Association
 logger = logging.getLogger('attributes')
 
 
 class Attribute(Base):
     """Atributo de uma classe."""
 
+    __slots__ = ('attr_type', 'tagged_values', 'stereotypes')
+
     def __init__(self, xml_attributes, tagged_values, stereotypes=None):
-        self.xml_attributes = xml_attributes
+        # O nome do tipo não pode ser simplesmente 'type', pois esta é uma palavra reservada.
+        self.attr_type = xml_attributes.get('Type')
         self.tagged_values = tagged_values
         self.stereotypes = stereotypes
-
-        # O instanciamento da classe superior no old-style é necessário, devido haverem classes que herdam
-        # dessa classe. Por algum motivo o interpretador se enrola em instanciar usando o super().
-        Base.__init__(self, xml_attributes)
+        super(Attribute, self).__init__(xml_attributes)
 
     def __str__(self):
         return u'Atributo "%s"' % self.name
 
-    @property
-    def attr_type(self):
-        """Tipo de dados do atributo.
-
-        O nome não pode ser simplesmente 'type', pois esta é uma palavra reservada."""
-        return self.xml_attributes['Type'] if 'Type' in self.xml_attributes.keys() else None
-
-    @property
+    @cached_property
     def colander_tagged_values(self):
         """Tagged values do atributo relacionados aos schemas do colander."""
         colander_attr = ['title', 'description', 'missing_msg', 'widget', 'validator', 'exclude', 'default']
-        data = {tv.name: tv for tv in self.tagged_values if tv.name in colander_attr}
+        data = OrderedDict((tv.name, tv) for tv in self.tagged_values if tv.name in colander_attr)
         return TaggedValues(data=data) if data is not None else None
 
     @property
@@ -45,46 +38,96 @@ class Attribute(Base):
         """Verifica se o atributo é de associação."""
         return isinstance(self, AssociationAttribute)
 
+    @property
+    def is_primary_key(self):
+        """Verifica se o atributo é chave primária, pelo tagged value 'primary_key'."""
+        return 'primary_key' in self.tagged_values.keys() and str(self.tagged_values['primary_key'].value) == 'True'
+
+    @property
+    def is_foreign_key(self):
+        """Verifica se o atributo é uma coluna de chave estrangeira, pelo tagged value 'ForeignKey' ("usuario.id") ou
+        por um 'ForeignKey(...)' no tipo, como em "Integer, ForeignKey('usuario.id')"."""
+        return 'ForeignKey' in self.tagged_values.keys() or 'ForeignKey(' in (self.attr_type or '')
+
+    @property
+    def is_unique(self):
+        """Verifica se a coluna tem restrição de unicidade, pelo tagged value 'unique'."""
+        return 'unique' in self.tagged_values.keys() and str(self.tagged_values['unique'].value) == 'True'
+
+    @property
+    def is_indexed(self):
+        """Verifica se a coluna é indexada, pelo tagged value 'index'.
+
+        Sem o tagged value, as colunas de chave estrangeira são indexadas, exceto as que já são chave primária ou
+        únicas, cujo índice é criado pelo próprio banco."""
+        if 'index' in self.tagged_values.keys():
+            return str(self.tagged_values['index'].value) == 'True'
+        return self.is_foreign_key and not self.is_primary_key and not self.is_unique
 
-class AssociationAttribute(Attribute, Association):
-    """Atributo de associação."""
+    @property
+    def eager_load(self):
+        """Indica se o atributo de associação é carregado junto nas listagens, pelo tagged value 'eager_load'."""
+        return 'eager_load' in self.tagged_values.keys() and str(self.tagged_values['eager_load'].value) == 'True'
+
+    @property
+    def title(self):
+        """Título de apresentação do atributo."""
+        return self.tagged_values['title'].value \
+            if 'title' in self.tagged_values.keys() else self.name
+
+
+class AssociationAttribute(Attribute):
+    """Atributo de associação.
+
+    Tem as classes de origem e de destino de uma associação, mas não herda de 'Association', pois duas classes-base com
+    '__slots__' próprios não podem ser combinadas."""
+
+    __slots__ = ('from_id', 'to_id', 'deferred')
 
     def __init__(self, xml_attributes, tagged_values, stereotypes=None):
-        self.xml_attributes = xml_attributes
-        self.tagged_values = tagged_values
-        self.stereotypes = stereotypes
-        super(AssociationAttribute, self).__init__(xml_attributes, tagged_values)
+        self.from_id = xml_attributes.get('EndRelationshipFromMetaModelElement')
+        self.to_id = xml_attributes.get('EndRelationshipToMetaModelElement')
+
+        # Indica se a classe de destino só é definida depois da classe de origem, devendo ser referenciada pelo nome.
+        self.deferred = False
+        super(AssociationAttribute, self).__init__(xml_attributes, tagged_values, stereotypes)
 
+    @classmethod
+    def from_association(cls, association):
+        """Cria o atributo de associação a partir de uma associação do modelo."""
+        return cls({'Id': association.id,
+                    'Name': association.name,
+                    'EndRelationshipFromMetaModelElement': association.from_id,
+                    'EndRelationshipToMetaModelElement': association.to_id}, association.tagged_values)
 
-class Atributos(OrderedDictBase):
+
+class Atributos(OrderedDictBase, Cacheable):
     """Atributos da classe."""
 
     def __init__(self, xmlclasse=None, data=None, class_associations=None):
         if xmlclasse is not None:
             self.__atributos = OrderedDict()
-            xmlatributos = xmlclasse.iterdescendants(tag="Attribute")
-
-            if xmlatributos is not None:
-                for xmlatributo in xmlatributos:
-                    # Atribuição dos parâmetros de construção do objeto classe.
-                    xml_attributes = xmlatributo.attrib
-                    tagged_values = TaggedValues(xmlatributo)
-                    stereotypes = Stereotypes(xmlatributo)
-
-                    # Contrução do atributo e inclusão na lista de atributos de classe.
-                    if stereotypes.find('name', 'association_attribute') is not None:
-                        atributo = AssociationAttribute(xml_attributes, tagged_values, stereotypes=stereotypes)
-                    else:
-                        atributo = Attribute(xml_attributes, tagged_values, stereotypes=stereotypes)
-
-                    self.__atributos[atributo.name] = atributo
-            else:
+            for xmlatributo in children(xmlclasse, 'ModelChildren', 'Attribute'):
+                # Atribuição dos parâmetros de construção do objeto classe.
+                xml_attributes = xmlatributo.attrib
+                tagged_values = TaggedValues(xmlatributo)
+                stereotypes = Stereotypes(xmlatributo)
+
+                # Contrução do atributo e inclusão na lista de atributos de classe.
+                if stereotypes.find('name', 'association_attribute') is not None:
+                    atributo = AssociationAttribute(xml_attributes, tagged_values, stereotypes=stereotypes)
+                else:
+                    atributo = Attribute(xml_attributes, tagged_values, stereotypes=stereotypes)
+
+                self.__atributos[atributo.name] = atributo
+
+            if not self.__atributos:
                 logger.debug(u'Nenhum atributo encontrado.')
 
             # Cria os atributos associativos.
             if class_associations is not None:
                 for association in class_associations:
-                    attribute = AssociationAttribute(association.xml_attributes, association.tagged_values)
+                    attribute = AssociationAttribute.from_association(association)
                     self.__atributos[attribute.name] = attribute
         elif data is not None:
             self.__atributos = data
@@ -100,7 +143,7 @@ class Atributos(OrderedDictBase):
             return_msg += '\n  %s' % str(attr)
         return return_msg
 
-    @property
+    @cached_property
     def association_attributes(self):
         """Lista de classes principais."""
         association_attributes = OrderedDict()
@@ -108,3 +151,12 @@ class Atributos(OrderedDictBase):
             if attribute.is_association_attribute:
                 association_attributes[attribute.id] = attribute
         return Atributos(data=association_attributes)
+
+    @cached_property
+    def column_attributes(self):
+        """Atributos da classe que são colunas, ou seja, que não são de associação."""
+        column_attributes = OrderedDict()
+        for attribute in self.__atributos.itervalues():
+            if not attribute.is_association_attribute:
+                column_attributes[attribute.name] = attribute
+        return Atributos(data=column_attributes)
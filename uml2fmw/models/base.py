@@ -1,24 +1,64 @@
 # -*- coding: utf-8 -*-
 """Classes-base herdadas por outras classes da aplicação."""
 
+from functools import wraps
 
-class Base(object):
-    """Classe base para as classes de dados."""
 
-    def __init__(self, xml_attributes):
-        self.xml_attributes = xml_attributes
+def cached_property(function):
+    """Propriedade derivada cujo valor é guardado no objeto depois que ele é congelado.
 
-    @property
-    def id(self):
-        """ID do objeto."""
-        return self.xml_attributes['Id']
+    Enquanto o objeto não está congelado, o valor é calculado a cada acesso. Valores que também podem ser congelados são
+    congelados junto, de forma que as propriedades deles também passam a ser guardadas."""
+    name = function.__name__
+
+    @wraps(function)
+    def getter(self):
+        cache = getattr(self, '_cache', None)
+        if cache is None:
+            return function(self)
+        if name not in cache:
+            value = function(self)
+            if isinstance(value, Cacheable):
+                value.freeze()
+            cache[name] = value
+        return cache[name]
+
+    return property(getter)
+
+
+class Cacheable(object):
+    """Objeto cujas propriedades derivadas podem ser guardadas depois do congelamento do modelo.
+
+    O atributo '_cache' só existe depois do congelamento, pois atributos declarados em '__slots__' não podem ter valor
+    padrão na classe."""
+
+    __slots__ = ('_cache',)
+
+    def freeze(self):
+        """Passa a guardar os valores das propriedades derivadas, calculados no primeiro acesso."""
+        if getattr(self, '_cache', None) is None:
+            self._cache = dict()
+
+    def invalidate(self):
+        """Descarta os valores guardados, que serão calculados novamente no próximo acesso."""
+        if getattr(self, '_cache', None) is not None:
+            self._cache = dict()
+
+
+class Base(Cacheable):
+    """Classe base para as classes de dados.
+
+    Os valores usados dos atributos XML são copiados para atributos declarados em '__slots__', de forma que os objetos
+    do modelo não guardem referências para a árvore do lxml, que pode ser descartada depois da leitura. As subclasses
+    declaram nos seus próprios '__slots__' todos os atributos que definem."""
+
+    __slots__ = ('id', 'name')
+
+    def __init__(self, xml_attributes):
+        self.id = xml_attributes.get('Id')
+        self.name = xml_attributes.get('Name', '')
 
     @property
     def lower_name(self):
         """Nome do objeto em caixa baixa."""
         return self.name.lower()
-
-    @property
-    def name(self):
-        """Nome do objeto."""
-        return self.xml_attributes['Name'] if 'Name' in self.xml_attributes.keys() else ''
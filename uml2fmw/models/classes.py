@@ -2,29 +2,56 @@
 """Classes que representam classes do modelo UML."""
 
 import logging
-from base import Base
+from base import Base, Cacheable, cached_property
 from gentle.base import OrderedDictBase
 from collections import OrderedDict
 from tagged_values import TaggedValues
 from attributes import Atributos
-from relationships import Generalizations
+from relationships import Associations, Generalizations, InheritanceGraph
 from stereotypes import Stereotypes
+from indexes import IndexDefinition, split_columns
+from ordering import topological_order
+from profiling import profiler
 logger = logging.getLogger('classes')
 
 
 class Classe(Base):
     """Objeto que representa uma classe."""
 
-    def __init__(self, attributes, xml_attributes, tagged_values, stereotypes=None):
+    __slots__ = ('nreferences', 'attributes', 'associations', 'tagged_values', 'parents', 'children', 'dependencies',
+                 'deferred_dependencies', 'stereotypes')
+
+    # Atributos que referenciam outras classes. Na serialização do modelo, são guardados como listas de IDs e refeitos
+    # depois por Classes.link, de forma que o pickle não percorra o grafo das classes de forma recursiva.
+    linked_slots = ('parents', 'children', 'dependencies', 'deferred_dependencies')
+
+    def __init__(self, attributes, xml_attributes, tagged_values, stereotypes=None, associations=None):
         self.nreferences = 0
         self.attributes = attributes
-        self.xml_attributes = xml_attributes
+        self.associations = associations if associations is not None else Associations()
         self.tagged_values = tagged_values
         self.parents = OrderedDict()
         self.children = OrderedDict()
+        self.dependencies = OrderedDict()
+        self.deferred_dependencies = OrderedDict()
         self.stereotypes = stereotypes
         super(Classe, self).__init__(xml_attributes)
 
+    def __getstate__(self):
+        """Estado da classe para o pickle, com as classes referenciadas substituídas pelos IDs."""
+        state = dict()
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if hasattr(self, name):
+                    state[name] = getattr(self, name)
+        for name in self.linked_slots:
+            state[name] = [classe.id for classe in state[name]]
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def __str__(self):
         return_str = u'Classe "%s"' % self.name
         return_str += str(self.attributes)
@@ -41,23 +68,71 @@ class Classe(Base):
 
         return return_str
 
-    @property
+    @cached_property
     def association_attributes(self):
         """Atributos de associação da classe."""
         return self.attributes.association_attributes
 
-    @property
+    @cached_property
+    def column_attributes(self):
+        """Colunas da classe, incluindo as herdadas, que vêm antes das próprias."""
+        column_attributes = OrderedDict()
+        for parent in self.parents:
+            column_attributes.update((a.name, a) for a in parent.column_attributes)
+        column_attributes.update((a.name, a) for a in self.attributes.column_attributes)
+        return Atributos(data=column_attributes)
+
+    @cached_property
+    def declared_indexes(self):
+        """Índices e restrições de unicidade compostos, dos tagged values 'index:<nome>' e 'unique:<nome>' da classe."""
+        indexes = list()
+        for tv in self.tagged_values:
+            kind = {'index': 'ix', 'unique': 'uq'}.get(tv.name.split(':')[0]) if ':' in tv.name else None
+            if kind is not None:
+                indexes.append(IndexDefinition(kind, self.root.tablename, split_columns(tv.value), u'classe'))
+        return indexes
+
+    @cached_property
+    def composite_indexes(self):
+        """Índices compostos declarados na classe cujas colunas existem na classe ou nas classes pais."""
+        columns = set(attribute.name for attribute in self.column_attributes)
+        return [index for index in self.declared_indexes if columns.issuperset(index.columns)]
+
+    @cached_property
+    def indexes(self):
+        """Índices e restrições de unicidade criados na tabela pelas colunas e pelos tagged values da classe.
+
+        Os índices compostos com colunas inexistentes são ignorados (ver 'declared_indexes')."""
+        indexes = list()
+        for attribute in self.attributes.column_attributes:
+            if attribute.is_unique and not attribute.is_primary_key:
+                indexes.append(IndexDefinition('uq', self.root.tablename, [attribute.name], u'atributo'))
+            if attribute.is_indexed:
+                origin = u'chave estrangeira' \
+                    if attribute.is_foreign_key and 'index' not in attribute.tagged_values.keys() else u'atributo'
+                indexes.append(IndexDefinition('ix', self.root.tablename, [attribute.name], origin))
+        return indexes + self.composite_indexes
+
+    @cached_property
     def colander_tagged_values(self):
         """Tagged values da classe relacionados aos schemas do colander."""
         colander_class = ['title', 'description']
-        data = {tv.id: tv for tv in self.tagged_values if tv.name in colander_class}
+        data = OrderedDict((tv.id, tv) for tv in self.tagged_values if tv.name in colander_class)
         return TaggedValues(data=data) if data is not None else None
 
-    @property
+    @cached_property
     def is_view_class(self):
         """Indica se a clase é uma view class."""
         return self.stereotypes.find('name', 'view_class') is not None
 
+    @cached_property
+    def primary_key(self):
+        """Atributo que é a chave primária da classe, incluindo as herdadas, ou None se não houver."""
+        for attribute in self.column_attributes:
+            if attribute.is_primary_key:
+                return attribute
+        return None
+
     @property
     def polymorphic_identity(self):
         """Valor do tagged value 'polymorphic_identity' da classe."""
@@ -76,7 +151,7 @@ class Classe(Base):
         else:
             return None
 
-    @property
+    @cached_property
     def related_classes(self):
         """Retorna uma lista com os IDs das classes referenciadas."""
         related_classes = list()
@@ -86,12 +161,20 @@ class Classe(Base):
             for parent in self.parents:
                 related_classes.append(parent.id)
 
-        # Associações são adicionadas em seguida.
-        for attribute in self.association_attributes:
-            related_classes.append(attribute.to_id)
+        # Associações são adicionadas em seguida, a partir do índice de associações da classe.
+        for association in self.associations:
+            related_classes.append(association.to_id)
 
         return related_classes
 
+    @property
+    def root(self):
+        """Classe da raiz da hierarquia, dona da tabela nas heranças de tabela única."""
+        classe = self
+        while bool(classe.parents):
+            classe = next(iter(classe.parents))
+        return classe
+
     @property
     def tablename(self):
         """Valor do tagged value 'tablename' da classe."""
@@ -105,10 +188,11 @@ class Classe(Base):
             if 'title' in self.tagged_values.keys() else self.name
 
 
-class Classes(OrderedDictBase):
+class Classes(OrderedDictBase, Cacheable):
     """Classes presentes no arquivo XML."""
 
     def __init__(self, xmlobj=None, data=None, associations=None):
+        self.inheritance = InheritanceGraph()
         if xmlobj is not None:
             self.__classes = OrderedDict()
             xmlclasses = xmlobj.Models.Class
@@ -116,19 +200,24 @@ class Classes(OrderedDictBase):
             if xmlclasses is not None:
                 view_classes = OrderedDict()
                 for xmlclasse in xmlclasses:
-                    # Atributos XML da classe.
-                    xml_attributes = xmlclasse.attrib
-                    class_id = xml_attributes['Id']
-
-                    # Outros atributos da classe.
-                    class_associations = associations.filter('from_id', class_id)
-                    attributes = Atributos(xmlclasse, class_associations=class_associations)
-                    tagged_values = TaggedValues(xmlclasse, from_class=True)
-                    stereotypes = Stereotypes(xmlclasse)
-
-                    # Cria o objeto Classe e adiciona na lista de classes.
-                    classe = Classe(attributes, xml_attributes, tagged_values, stereotypes=stereotypes)
-                    classe.nreferences = len(class_associations)
+                    with profiler.phase('model.classes'):
+                        # Atributos XML da classe.
+                        xml_attributes = xmlclasse.attrib
+                        class_id = xml_attributes['Id']
+
+                        # Outros atributos da classe.
+                        class_associations = associations.from_class(class_id)
+                        with profiler.phase('model.attributes'):
+                            attributes = Atributos(xmlclasse, class_associations=class_associations)
+                        tagged_values = TaggedValues(xmlclasse)
+                        stereotypes = Stereotypes(xmlclasse)
+
+                        # Cria o objeto Classe e adiciona na lista de classes.
+                        classe = Classe(attributes, xml_attributes, tagged_values, stereotypes=stereotypes,
+                                        associations=class_associations)
+                        classe.nreferences = len(class_associations)
+                    profiler.count('classes')
+                    profiler.count('attributes', len(attributes))
 
                     # Adiciona as classes, evitando adicionar as view classes.
                     # As view classes tem que ser as últimas, por depender de
@@ -144,10 +233,12 @@ class Classes(OrderedDictBase):
                         self.__classes[vclasse.id] = vclasse
 
                 # Conecta as classes através da lista de generalizações.
-                self.connect(xmlobj)
+                with profiler.phase('model.connect'):
+                    self.connect(xmlobj)
 
                 # Ordena as classes numa segundo uma lógica de referências.
-                # self.order()
+                with profiler.phase('model.order'):
+                    self.order()
             else:
                 logger.debug(u'Nenhuma classe localizada.')
         elif data is not None:
@@ -165,76 +256,85 @@ class Classes(OrderedDictBase):
             strclass += str(classe)
         return strclass
 
-    def connect(self, xmlobj):
-        """Analisa a lista de generalizações recebida e faz as relações entre as classes."""
-        generalizacoes = Generalizations(xmlobj)
-
+    def link(self):
+        """Refaz as referências entre as classes, guardadas como listas de IDs na serialização do modelo."""
+        empty = Classes()
         for classe in self.__classes.itervalues():
-            # Busca generalizações relacionadas à classe.
-            parents = OrderedDict()
-            children = OrderedDict()
+            for name in Classe.linked_slots:
+                class_ids = getattr(classe, name)
+                if isinstance(class_ids, list):
+                    setattr(classe, name, Classes(data=OrderedDict((i, self.__classes[i]) for i in class_ids))
+                            if class_ids else empty)
 
-            for gen in generalizacoes:
-                # Localiza os filhos da classe.
-                if classe.id == gen.from_id:
-                    children[gen.to_id] = self.__classes[gen.to_id]
+    def connect(self, xmlobj):
+        """Analisa a lista de generalizações recebida e faz as relações entre as classes.
 
-                # Localiza os pais da classe.
-                if classe.id == gen.to_id:
-                    classe.nreferences += 1  # adiciona à genrelalização ao contador de referências.
-                    parents[gen.from_id] = self.__classes[gen.from_id]
+        As generalizações são agrupadas numa única passada no grafo de herança, a partir do qual os pais e filhos de
+        cada classe são atribuídos. Classes sem herança compartilham um mesmo contêiner vazio."""
+        generalizacoes = Generalizations(xmlobj)
+        profiler.count('generalizations', len(generalizacoes))
+        self.inheritance = InheritanceGraph(generalizacoes)
+        empty = Classes()
 
-            if parents is not None:
-                classe.parents = Classes(data=parents)
+        # Cada generalização é contada como uma referência da classe filha.
+        for child_id, parent_ids in self.inheritance.parents.iteritems():
+            self.__classes[child_id].nreferences += len(parent_ids)
 
-            if children is not None:
-                classe.children = Classes(data=children)
+        for classe in self.__classes.itervalues():
+            parent_ids = self.inheritance.parents.get(classe.id)
+            child_ids = self.inheritance.children.get(classe.id)
+            classe.parents = Classes(data=OrderedDict((i, self.__classes[i]) for i in parent_ids)) \
+                if parent_ids else empty
+            classe.children = Classes(data=OrderedDict((i, self.__classes[i]) for i in child_ids)) \
+                if child_ids else empty
 
     def order(self):
         """Sequencia as classes baseado nas referências que as classes fazem entre elas.
 
-        Começa adicionando classes que não fazem referências a outras, seja por genralização ou associação.
-        A partir disso, busca classes que façam referências às classes anteriores, e segue repetindo esse procedimento
-        até que nenhuma nova alteração seja feita na lista.
+        Faz a ordenação topológica das classes a partir das classes relacionadas (generalizações e associações), de
+        forma que cada classe venha depois das classes que referencia. Os ciclos são logados com os nomes das classes
+        envolvidas, e as associações que apontam para classes ainda não definidas são marcadas como tardias, para que o
+        relationship() referencie a classe pelo nome.
         """
-        lap = 1
-        have_changes = True
-        ordered_classes = OrderedDict()
-        while have_changes:
-            print [x.name for x in ordered_classes.itervalues()]  # <<<<--------- EXCLUIR!!!
-            have_changes = False
-            for classe in self.__classes.itervalues():
-                # Na primeira volta, carrega as classes que não fazem referências a nenhuma outras.
-                if lap == 1:
-                    if classe.nreferences == 0:
-                        ordered_classes[classe.id] = classe
-                        have_changes = True
-                else:
-                    related = OrderedDict()
-                    for oclass in ordered_classes.itervalues():
-                        if classe.id not in ordered_classes.keys():
-                            if oclass.id in classe.referenced_classes:
-                                related[classe.id] = classe
-                                have_changes = True
-                    if bool(related):
-                        ordered_classes.update(related.copy())
-            lap += 1
-
-        # Retorna a lista de classes ordenada inversamente.
-        self.__classes = ordered_classes
-        return ordered_classes
+        dependencies = {classe.id: classe.related_classes for classe in self.__classes.itervalues()}
+        ordered_ids, cycles = topological_order(list(self.__classes.keys()), dependencies)
 
-    @property
+        for cycle in cycles:
+            logger.warning(u'Ciclo de referências entre as classes: %s.' %
+                           u', '.join(self.__classes[class_id].name for class_id in cycle))
+
+        # Reordena o dicionário no próprio lugar, pois ele é compartilhado com a classe superior.
+        ordered_classes = OrderedDict((class_id, self.__classes[class_id]) for class_id in ordered_ids)
+        self.__classes.clear()
+        self.__classes.update(ordered_classes)
+
+        # Marca as associações cuja classe de destino não foi definida antes da classe de origem, separando as classes
+        # referenciadas diretamente das referenciadas de forma tardia.
+        position = {class_id: i for i, class_id in enumerate(ordered_ids)}
+        for classe in self.__classes.itervalues():
+            dependencies = OrderedDict((parent.id, parent) for parent in classe.parents)
+            deferred_dependencies = OrderedDict()
+            for attribute in classe.association_attributes:
+                attribute.deferred = position.get(attribute.to_id, -1) >= position[classe.id]
+                if attribute.to_id in self.__classes and attribute.to_id != classe.id:
+                    target = dependencies if not attribute.deferred else deferred_dependencies
+                    target[attribute.to_id] = self.__classes[attribute.to_id]
+            classe.dependencies = Classes(data=dependencies)
+            classe.deferred_dependencies = Classes(data=deferred_dependencies)
+
+        return self.__classes
+
+    @cached_property
     def child_classes(self):
         """Classes que são filhas de outras classes."""
         return self.filter('parents')
 
-    @property
+    @cached_property
     def parent_classes(self):
         """Classes que são são pais de outras classes."""
         return self.filter('children')
 
-    @property
+    @cached_property
     def view_classes(self):
         """Lista de classes principais."""
         return self.filter('is_view_class', True)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo do perfil de banco de dados da aplicação gerada.
+
+    O perfil reúne as opções de conexão usadas em produção: tamanho e transbordo do pool de conexões, teste das conexões
+    antes do uso, reciclagem, cache de comandos e, no SQLite, o modo WAL e os pragmas 'synchronous' e 'mmap_size'. Os
+    valores vêm dos tagged values do projeto com o prefixo 'db_' (por exemplo, 'db_pool_size') e podem ser sobrescritos
+    pela linha de comando, com '--set db_pool_size=20'. O perfil é gravado no 'production.ini' da aplicação gerada.
+"""
+
+from collections import OrderedDict
+
+
+def boolean(value):
+    """Converte o valor informado como texto (tagged value ou linha de comando) para booleano."""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('true', '1', 'yes', 'on', 'sim')
+
+
+def synchronous(value):
+    """Valida o valor do pragma 'synchronous' do SQLite."""
+    value = str(value).strip().upper()
+    if value not in ('OFF', 'NORMAL', 'FULL', 'EXTRA'):
+        raise ValueError('Valor inválido para o pragma synchronous: "%s".' % value)
+    return value
+
+
+class DatabaseProfile(object):
+    """Perfil de banco de dados, com os valores padrão sobrescritos pelos tagged values do projeto."""
+
+    # Prefixo das opções nos tagged values do projeto e na configuração do gerador.
+    prefix = 'db_'
+
+    # Opções aceitas, com o tipo e o valor padrão de cada uma. A URL vazia mantém o SQLite do scaffold.
+    options = OrderedDict([
+        ('url', (str, None)),
+        ('pool_size', (int, 10)),
+        ('max_overflow', (int, 20)),
+        ('pool_pre_ping', (boolean, True)),
+        ('pool_recycle', (int, 3600)),
+        ('statement_cache_size', (int, 500)),
+        ('sqlite_wal', (boolean, True)),
+        ('sqlite_synchronous', (synchronous, 'NORMAL')),
+        ('sqlite_mmap_size', (int, 256 * 1024 * 1024)),
+    ])
+
+    def __init__(self, tagged_values=None):
+        for name, (_, default) in self.options.items():
+            setattr(self, name, default)
+
+        if tagged_values is not None:
+            self.update(**{tv.name[len(self.prefix):]: tv.value for tv in tagged_values
+                           if tv.name.startswith(self.prefix) and tv.name[len(self.prefix):] in self.options})
+
+    def update(self, **values):
+        """Altera as opções informadas, convertendo os valores. Valores None são ignorados."""
+        for name, value in values.items():
+            if name not in self.options:
+                raise ValueError('Opção de banco de dados desconhecida: "%s".' % name)
+            if value is not None and value != '':
+                setattr(self, name, self.options[name][0](value))
+
+    def settings(self):
+        """Opções do perfil no formato do arquivo .ini da aplicação, exceto a URL: {'db.opção': 'valor'}."""
+        settings = OrderedDict()
+        for name in self.options:
+            value = getattr(self, name)
+            if name != 'url' and value is not None:
+                settings['db.' + name] = str(value).lower() if isinstance(value, bool) else str(value)
+        return settings
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo dos índices e restrições de unicidade das tabelas.
+
+    Os índices vêm dos tagged values 'index' e 'unique' dos atributos, dos tagged values 'index:<nome>' e
+    'unique:<nome>' das classes, cujo valor é a lista de colunas separadas por vírgula, e das colunas de chave
+    estrangeira, indexadas automaticamente. São chaves estrangeiras os atributos com o tagged value 'ForeignKey' ou com
+    'ForeignKey(...)' no tipo; as associações em si não geram colunas de chave estrangeira, apenas o relationship.
+
+    Os nomes não são gravados no código gerado: eles são atribuídos pelo SQLAlchemy segundo o NAMING_CONVENTION do
+    'models/meta.py' do scaffold, reproduzido aqui para o relatório da geração.
+"""
+
+# Formatos dos nomes, iguais aos do NAMING_CONVENTION do scaffold, por tipo: 'ix' para índices e 'uq' para restrições
+# de unicidade.
+NAME_FORMATS = {
+    'ix': 'ix_%(table_name)s_%(column_names)s',
+    'uq': 'uq_%(table_name)s_%(column_names)s',
+}
+
+
+class IndexDefinition(object):
+    """Índice ou restrição de unicidade sobre as colunas informadas de uma tabela."""
+
+    __slots__ = ('kind', 'tablename', 'columns', 'origin')
+
+    def __init__(self, kind, tablename, columns, origin):
+        self.kind = kind
+        self.tablename = tablename
+        self.columns = tuple(columns)
+        # Origem do índice, para o relatório: 'atributo', 'classe' ou 'chave estrangeira'.
+        self.origin = origin
+
+    def __str__(self):
+        return u'%s (%s, %s)' % (self.name, u', '.join(self.columns), self.origin)
+
+    @property
+    def unique(self):
+        """Indica se é uma restrição de unicidade."""
+        return self.kind == 'uq'
+
+    @property
+    def name(self):
+        """Nome atribuído pelo NAMING_CONVENTION."""
+        return NAME_FORMATS[self.kind] % {'table_name': self.tablename, 'column_names': '_'.join(self.columns)}
+
+
+def split_columns(value):
+    """Colunas de um tagged value de índice composto, separadas por vírgula."""
+    return [column.strip() for column in str(value).split(',') if column.strip()]
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo de leitura incremental do XML exportado pelo Visual Paradigm.
+
+    Em vez de carregar o arquivo inteiro numa string e objetificá-lo de uma vez, o XML é lido com o iterparse do lxml,
+    mantendo em memória apenas as subárvores utilizadas pelos modelos: as classes e os contêineres de relacionamentos
+    filhos diretos de 'Models', e os tagged values do próprio projeto. Todo o resto (diagramas, layouts, informações do
+    projeto etc.) é descartado assim que termina de ser lido.
+"""
+
+import logging
+from hashlib import sha1
+from lxml import etree, objectify
+logger = logging.getLogger('loader')
+
+# Tags dos filhos de 'Models' que devem ser mantidas na árvore.
+KEPT_TAGS = ('Class', 'ModelRelationshipContainer')
+
+# Tags dos filhos da raiz mantidos na árvore, além do 'Models'.
+KEPT_ROOT_TAGS = ('TaggedValues',)
+
+# Tags dos elementos do modelo com hash próprio: as classes e os relacionamentos entre elas.
+DIGESTED_TAGS = ('Class', 'Association', 'Generalization')
+
+
+def stream_xml(xml_file, digest=None, element_digests=None):
+    """Lê o XML de forma incremental e retorna a árvore objetificada reduzida ao que é usado pelo projeto.
+
+    A árvore retornada tem a mesma forma da gerada pelo 'objectify.fromstring' (raiz 'Project' com seus atributos e o
+    elemento 'Models'), porém contendo somente as subárvores listadas em KEPT_TAGS e KEPT_ROOT_TAGS. Caso seja
+    informado um objeto de hash do hashlib em 'digest', ele é atualizado com o conteúdo dessas subárvores, de forma que
+    mudanças apenas nos diagramas não alteram o hash do modelo.
+
+    Caso seja informado um dicionário em 'element_digests', ele recebe o hash de cada classe e relacionamento do modelo
+    (DIGESTED_TAGS), pelo ID do elemento, junto com os IDs das classes envolvidas: {ID: (hash, (IDs das classes))}.
+    """
+    context = etree.iterparse(xml_file, events=('start', 'end'), remove_blank_text=True, huge_tree=True)
+    context.set_element_class_lookup(objectify.ObjectifyElementClassLookup())
+
+    root = None
+    path = list()
+    discarded = 0
+    for event, element in context:
+        if event == 'start':
+            if root is None:
+                root = element
+                if digest is not None:
+                    digest.update(repr(sorted(root.attrib.items())))
+            path.append(element.tag)
+            continue
+
+        # No evento de fim, o caminho passa a conter apenas os ancestrais do elemento.
+        path.pop()
+        if not path:
+            break
+
+        # Mantém a raiz, o 'Models' e as subárvores desejadas dentro dele, e os tagged values do projeto.
+        if len(path) == 1 and element.tag == 'Models':
+            continue
+        if (path[1] if len(path) > 1 else element.tag) in KEPT_ROOT_TAGS:
+            if digest is not None and len(path) == 1:
+                digest.update(etree.tostring(element))
+            continue
+        if len(path) >= 2 and path[1] == 'Models' and (path[2] if len(path) > 2 else element.tag) in KEPT_TAGS:
+            hashed = digest is not None and len(path) == 2
+            digested = element_digests is not None and element.tag in DIGESTED_TAGS and element.get('Id')
+            if hashed or digested:
+                code = etree.tostring(element)
+                if hashed:
+                    digest.update(code)
+                if digested:
+                    element_digests[element.get('Id')] = (sha1(code).hexdigest(), related_ids(element))
+            continue
+
+        # Descarta o elemento consumido, liberando a memória ocupada por ele.
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            parent.remove(element)
+        discarded += 1
+
+    del context
+    logger.debug(u'Leitura incremental concluída, %d elementos descartados.' % discarded)
+    return root
+
+
+def related_ids(element):
+    """IDs das classes envolvidas num elemento do modelo: a própria classe ou as pontas do relacionamento."""
+    if element.tag == 'Class':
+        return element.get('Id'),
+    return tuple(class_id for class_id in (element.get('EndRelationshipFromMetaModelElement') or element.get('From'),
+                                           element.get('EndRelationshipToMetaModelElement') or element.get('To'))
+                 if class_id)
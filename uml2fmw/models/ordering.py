@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo de ordenação das classes por dependência.
+
+    Implementa a ordenação topológica (algoritmo de Kahn) usada para que cada classe seja definida depois das classes
+    que ela referencia, além da detecção dos ciclos de referências (algoritmo de Tarjan). Ambos rodam em O(V+E).
+"""
+
+import logging
+from collections import deque
+logger = logging.getLogger('ordering')
+
+
+def topological_order(nodes, dependencies):
+    """Ordena os nós de forma que cada um venha depois das suas dependências.
+
+    'nodes' é a sequência de IDs na ordem preferencial, usada para desempatar, e 'dependencies' é um dicionário que
+    relaciona cada ID aos IDs dos quais ele depende. Dependências fora de 'nodes' são ignoradas.
+
+    Quando há ciclos, a ordenação não trava: os nós de cada ciclo são colocados juntos, depois de todas as dependências
+    externas ao ciclo, e as referências entre eles passam a ter de ser resolvidas de forma tardia. Retorna a lista
+    ordenada de IDs e a lista de ciclos encontrados, cada um como uma lista de IDs.
+    """
+    position = {node: i for i, node in enumerate(nodes)}
+
+    # Monta os graus de entrada e a lista de dependentes de cada nó.
+    indegree = dict.fromkeys(nodes, 0)
+    dependents = dict()
+    edges = dict()
+    for node in nodes:
+        node_edges = edges[node] = list()
+        seen = set()
+        for dependency in dependencies.get(node, ()):
+            if dependency not in position or dependency == node or dependency in seen:
+                continue
+            seen.add(dependency)
+            node_edges.append(dependency)
+            dependents.setdefault(dependency, list()).append(node)
+            indegree[node] += 1
+
+    # Kahn: libera os nós à medida que todas as suas dependências já foram ordenadas.
+    ordered = list()
+    ready = deque(node for node in nodes if indegree[node] == 0)
+    while ready:
+        node = ready.popleft()
+        ordered.append(node)
+        for dependent in dependents.get(node, ()):
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                ready.append(dependent)
+
+    # Os nós que sobraram estão em ciclos ou dependem deles. Os componentes fortemente conexos saem com as dependências
+    # primeiro, de forma que basta acrescentá-los em sequência, cada um na ordem preferencial.
+    cycles = list()
+    if len(ordered) < len(nodes):
+        blocked = [node for node in nodes if indegree[node] > 0]
+        for component in strongly_connected_components(blocked, edges):
+            component.sort(key=position.get)
+            ordered.extend(component)
+            if len(component) > 1:
+                cycles.append(component)
+
+    return ordered, cycles
+
+
+def strongly_connected_components(nodes, edges):
+    """Componentes fortemente conexos entre os nós informados, usando uma versão iterativa do algoritmo de Tarjan.
+
+    Arestas para nós fora da lista são ignoradas. Os componentes são retornados com as dependências primeiro, ou seja,
+    cada componente só aponta para componentes retornados antes dele."""
+    members = set(nodes)
+    index = dict()
+    lowlink = dict()
+    stack = list()
+    on_stack = set()
+    components = list()
+
+    for start in nodes:
+        if start in index:
+            continue
+
+        index[start] = lowlink[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(edges.get(start, ())))]
+
+        while work:
+            node, targets = work[-1]
+            advanced = False
+            for target in targets:
+                if target not in members:
+                    continue
+                if target not in index:
+                    index[target] = lowlink[target] = len(index)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(edges.get(target, ()))))
+                    advanced = True
+                    break
+                elif target in on_stack:
+                    lowlink[node] = min(lowlink[node], index[target])
+            if advanced:
+                continue
+
+            # Todos os destinos do nó foram visitados: propaga o lowlink e fecha o componente, se for o caso.
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                component = list()
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
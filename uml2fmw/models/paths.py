@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo de extração de elementos do XML por caminhos relativos.
+
+    O 'iterdescendants' percorre toda a subárvore abaixo do elemento, de forma que, por exemplo, a busca pelos
+    estereótipos de uma classe também encontra os estereótipos dos atributos dela. As funções deste módulo percorrem
+    apenas os filhos diretos de cada nível do caminho informado, lendo cada elemento do modelo uma única vez.
+"""
+
+# Tag dos contêineres de relacionamentos, que podem estar aninhados uns nos outros.
+CONTAINER_TAG = 'ModelRelationshipContainer'
+
+
+def children(xmlobj, *path):
+    """Elementos no caminho relativo ao elemento informado, como em children(xmlclasse, 'Stereotypes', 'Stereotype').
+
+    Cada nível do caminho é a tag de um filho direto do nível anterior."""
+    if not path:
+        yield xmlobj
+        return
+
+    for child in xmlobj.iterchildren(tag=path[0]):
+        for element in children(child, *path[1:]):
+            yield element
+
+
+def tagged_values(xmlobj):
+    """Tagged values do próprio elemento, sem os tagged values dos elementos filhos.
+
+    A busca é limitada ao contêiner 'TaggedValues' filho direto do elemento. Dentro dele, a forma como os tagged values
+    são agrupados varia entre as exportações, por isso eles são buscados em qualquer nível."""
+    for xmlcontainer in children(xmlobj, 'TaggedValues'):
+        for xmltaggedvalue in xmlcontainer.iterdescendants(tag='TaggedValue'):
+            yield xmltaggedvalue
+
+
+def relationships(xmlobj, tag):
+    """Relacionamentos com a tag informada, presentes nos contêineres de relacionamentos do modelo.
+
+    Os contêineres aninhados são percorridos na ordem do documento, mas não o interior dos relacionamentos, onde o
+    Visual Paradigm coloca apenas referências (sem ID) a outros elementos."""
+    for xmlcontainer in children(xmlobj, 'Models', CONTAINER_TAG):
+        for element in container_children(xmlcontainer, tag):
+            yield element
+
+
+def container_children(xmlcontainer, tag):
+    """Elementos com a tag informada no contêiner de relacionamentos e nos contêineres aninhados nele."""
+    for element in children(xmlcontainer, 'ModelChildren', '*'):
+        if element.tag == tag:
+            yield element
+        elif element.tag == CONTAINER_TAG:
+            for nested in container_children(element, tag):
+                yield nested
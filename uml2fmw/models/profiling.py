@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo de instrumentação da geração.
+
+    O 'profiler' do módulo acumula o tempo e a quantidade de execuções de cada fase da geração (leitura do XML,
+    montagem das classes, atributos e associações, conexão, compilação, renderização e escrita de cada template), além
+    de contagens de objetos. Os tempos das fases aninhadas também são contados nas fases externas.
+
+    Ele fica desligado por padrão, quando as fases não medem nada, e é ligado pela opção '--profile' do
+    'uml2pyramid.py', que grava o relatório em JSON. Opcionalmente, uma das fases pode ser analisada pelo cProfile, com
+    as estatísticas gravadas num arquivo à parte.
+"""
+
+import json
+import time
+from os.path import splitext
+from contextlib import contextmanager
+from collections import OrderedDict
+
+
+class Profiler(object):
+    """Acumulador de tempos por fase e de contagens de objetos."""
+
+    def __init__(self):
+        self.enabled = False
+        self.phases = OrderedDict()
+        self.counts = OrderedDict()
+        self.profiled_phase = None
+        self.profile = None
+        self.__profiling = 0
+
+    def enable(self, profiled_phase=None):
+        """Liga a instrumentação. Caso informada, a fase 'profiled_phase' também é analisada pelo cProfile."""
+        self.enabled = True
+        self.profiled_phase = profiled_phase
+        if profiled_phase is not None:
+            import cProfile
+            self.profile = cProfile.Profile()
+
+    @contextmanager
+    def phase(self, name):
+        """Mede o bloco como uma execução da fase informada. Fases podem ser aninhadas."""
+        if not self.enabled:
+            yield
+            return
+
+        profiling = self.profile is not None and name == self.profiled_phase
+        if profiling:
+            self.__profiling += 1
+            if self.__profiling == 1:
+                self.profile.enable()
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            elapsed = time.time() - start
+            if profiling:
+                self.__profiling -= 1
+                if self.__profiling == 0:
+                    self.profile.disable()
+
+            phase = self.phases.setdefault(name, {'seconds': 0.0, 'calls': 0})
+            phase['seconds'] += elapsed
+            phase['calls'] += 1
+
+    def count(self, name, quantity=1):
+        """Soma a quantidade informada à contagem de objetos com o nome informado."""
+        if self.enabled:
+            self.counts[name] = self.counts.get(name, 0) + quantity
+
+    def report(self):
+        """Relatório com os tempos das fases e as contagens de objetos."""
+        return {'phases': self.phases, 'counts': self.counts, 'profiled_phase': self.profiled_phase}
+
+    def save(self, report_file):
+        """Grava o relatório em JSON e, caso alguma fase tenha sido analisada, as estatísticas do cProfile num arquivo
+        com o mesmo nome e a extensão '.prof', que pode ser lido com o módulo pstats."""
+        with open(report_file, 'w') as rf:
+            json.dump(self.report(), rf, indent=1)
+
+        if self.profile is not None:
+            self.profile.dump_stats(splitext(report_file)[0] + '.prof')
+
+
+# Instrumentação compartilhada por todos os módulos da geração.
+profiler = Profiler()
@@ -2,37 +2,160 @@
 """Módulo com definições do projeto."""
 
 import logging
-from lxml import objectify
+from hashlib import sha1
 from base import Base
 from classes import Classes
 from relationships import Associations
+from tagged_values import TaggedValues
+from database import DatabaseProfile
+from profiling import profiler
 logger = logging.getLogger('project')
 
 
 class Project(Base):
-    """Representação de um projeto."""
+    """Representação de um projeto.
 
-    def __init__(self, xmlobj):
-        self.associations = Associations(xmlobj)
+    Único no modelo, o projeto não declara '__slots__' e mantém o dicionário de atributos."""
+
+    def __init__(self, xmlobj, digest=None, element_digests=None):
+        self.digest = digest
+        # Hash de cada classe e relacionamento do XML, com as classes envolvidas: {ID: (hash, (IDs das classes))}.
+        self.element_digests = element_digests if element_digests is not None else dict()
+        # Relacionamentos de cada classe ({ID da classe: [IDs dos relacionamentos]}) e hashes já calculados por classe,
+        # montados no primeiro uso de class_digest.
+        self.__element_index = None
+        self.__class_digests = dict()
+        with profiler.phase('model.associations'):
+            self.associations = Associations(xmlobj)
         self.classes = Classes(xmlobj, associations=self.associations)
-        xml_attributes = xmlobj.attrib
-        super(Project, self).__init__(xml_attributes)
+        self.inheritance = self.classes.inheritance
+        self.author = xmlobj.get('Author')
+        self.tagged_values = TaggedValues(xmlobj)
+        self.database = DatabaseProfile(self.tagged_values)
+        super(Project, self).__init__(xmlobj.attrib)
+
+    def __setstate__(self, state):
+        """Restaura o projeto lido do cache, refazendo as referências entre as classes (ver Classe.__getstate__)."""
+        attributes, slots = state if isinstance(state, tuple) else (state, None)
+        self.__dict__.update(attributes)
+        for name, value in (slots or dict()).items():
+            setattr(self, name, value)
+        self.classes.link()
 
     @classmethod
-    def from_xml(cls, xml_file):
-        """Cria uma instância de classes a partir de um XML."""
+    def from_xml(cls, xml_file, cache=None):
+        """Cria uma instância de classes a partir de um XML.
+
+        Caso seja informado um cache de projetos (SnapshotCache), o projeto é carregado dele quando o XML e o código dos
+        modelos não mudaram desde que foi guardado, e guardado nele após a leitura caso contrário."""
+        if cache is not None:
+            with profiler.phase('cache.load'):
+                key = cache.key(xml_file)
+                project = cache.load(key)
+            if project is not None:
+                logger.info(u'Projeto "%s" carregado do cache.' % project.name)
+                return project
+
+        # Lê o arquivo XML de forma incremental, mantendo apenas as classes e relacionamentos. O lxml só é importado
+        # quando o projeto não está no cache. Os elementos já são objetificados durante a leitura.
+        with profiler.phase('xml.read'):
+            from loader import stream_xml
+            sha = sha1()
+            element_digests = dict()
+            xmlobj = stream_xml(xml_file, digest=sha, element_digests=element_digests)
+
+        # Cria o projeto e congela as propriedades derivadas do modelo.
+        # O projeto não guarda referências para a árvore XML, que é descartada ao final da leitura.
+        with profiler.phase('model.build'):
+            project = cls(xmlobj=xmlobj, digest=sha.hexdigest(), element_digests=element_digests)
+        del xmlobj
+        with profiler.phase('model.freeze'):
+            project.freeze()
+
+        if cache is not None:
+            with profiler.phase('cache.store'):
+                cache.store(key, project)
+        return project
+
+    def class_digest(self, classe):
+        """Hash da parte do modelo usada pelos templates renderizados para a classe.
+
+        Inclui a própria classe, as classes pais, filhas, relacionadas e importadas, e os relacionamentos da classe e
+        das classes pais, além das referências tardias, que dependem da ordem de todas as classes. Alterações em outras
+        classes não mudam o hash, de forma que a geração incremental renderiza novamente apenas os arquivos afetados.
+
+        Os relacionamentos de cada classe são indexados uma única vez, e o hash de cada classe é calculado uma única vez
+        por projeto."""
+        if classe.id in self.__class_digests:
+            return self.__class_digests[classe.id]
+        ancestors = set()
+        pending = list(classe.parents)
+        while pending:
+            parent = pending.pop()
+            if parent.id not in ancestors:
+                ancestors.add(parent.id)
+                pending.extend(parent.parents)
+
+        owners = ancestors | {classe.id}
+        scope = set(owners)
+        scope.update(child.id for child in classe.children)
+        scope.update(classe.related_classes)
+        scope.update(dependency.id for dependency in classe.dependencies)
+        scope.update(dependency.id for dependency in classe.deferred_dependencies)
+
+        if self.__element_index is None:
+            self.__element_index = dict()
+            for element_id, (_, class_ids) in self.element_digests.items():
+                for class_id in class_ids:
+                    self.__element_index.setdefault(class_id, list()).append(element_id)
+
+        # Classes do escopo e relacionamentos da classe ou das classes pais.
+        element_ids = set(element_id for element_id in scope if element_id in self.element_digests)
+        for owner in owners:
+            element_ids.update(self.__element_index.get(owner, ()))
+
+        sha = sha1(repr((self.name,
+                         [dependency.name for dependency in classe.dependencies],
+                         [dependency.name for dependency in classe.deferred_dependencies],
+                         [(attribute.name, attribute.deferred) for attribute in classe.association_attributes])))
+        for element_id in sorted(element_ids):
+            sha.update(element_id + self.element_digests[element_id][0])
+        self.__class_digests[classe.id] = sha.hexdigest()
+        return self.__class_digests[classe.id]
+
+    def cacheables(self):
+        """Objetos do modelo cujas propriedades derivadas podem ser guardadas."""
+        yield self.classes
+        yield self.tagged_values
+        for classe in self.classes:
+            yield classe
+            yield classe.tagged_values
+            yield classe.attributes
+            for attribute in classe.attributes:
+                yield attribute
+                yield attribute.tagged_values
 
-        # Lê o arquivo XML.
-        with open(xml_file) as xf:
-            xml = xf.read()
+    def freeze(self):
+        """Congela o modelo, calculando de uma vez as propriedades derivadas usadas pelos templates.
 
-        # Objetifica o xml e lê as classes.
-        xmlobj = objectify.fromstring(xml)
+        A partir daí, essas propriedades são guardadas nos objetos. Ferramentas que alteram o modelo em memória devem
+        chamar o método 'invalidate' depois das alterações."""
+        for cacheable in self.cacheables():
+            cacheable.freeze()
 
-        # Retorna o construtor.
-        return cls(xmlobj=xmlobj)
+        self.classes.view_classes
+        for classe in self.classes:
+            classe.association_attributes
+            classe.colander_tagged_values
+            classe.related_classes
+            for attribute in classe.attributes:
+                attribute.colander_tagged_values.not_widget_related
+                attribute.tagged_values.widget_related
 
-    @property
-    def author(self):
-        """Author do projeto."""
-        return self.xml_attributes['Author']
+    def invalidate(self):
+        """Descarta as propriedades guardadas depois de alterações no modelo em memória e congela o modelo novamente."""
+        for cacheable in self.cacheables():
+            cacheable.invalidate()
+        self.__element_index = None
+        self.__class_digests = dict()
+        self.freeze()
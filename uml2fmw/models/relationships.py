@@ -2,29 +2,31 @@
 """Classes que representam relações entre as classes do diagrama."""
 
 import logging
+from collections import OrderedDict, deque
 from base import Base
 from gentle.base import DictBase
 from tagged_values import TaggedValues
+from paths import relationships
+from profiling import profiler
 logger = logging.getLogger('relationships')
 
 
 class Relationship(Base):
-    """Representa uma relação genérica entre classes."""
+    """Representa uma relação genérica entre classes, com os IDs das classes de origem e de destino."""
 
-    @property
-    def from_id(self):
-        """Classe de origem da relação."""
-        return self.xml_attributes['From']
+    __slots__ = ('from_id', 'to_id')
 
-    @property
-    def to_id(self):
-        """Classe de destino da relação."""
-        return self.xml_attributes['To']
+    def __init__(self, xml_attributes):
+        self.from_id = xml_attributes.get('From')
+        self.to_id = xml_attributes.get('To')
+        super(Relationship, self).__init__(xml_attributes)
 
 
 class Generalization(Relationship):
     """Representação de uma generalização."""
 
+    __slots__ = ()
+
 
 class Generalizations(DictBase):
     """Lista de generalizações do diagrama."""
@@ -32,17 +34,11 @@ class Generalizations(DictBase):
     def __init__(self, xmlobj=None, data=None):
         if xmlobj is not None:
             self.__generalizacoes = dict()
-            xmlcontainer = xmlobj.Models.ModelRelationshipContainer
-            xmlgeneralizations = xmlcontainer.iterdescendants(tag="Generalization")
-
-            if xmlgeneralizations is not None:
-                for xmlgeneralization in xmlgeneralizations:
-                    gen = Generalization(xmlgeneralization.attrib)
+            for xmlgeneralization in relationships(xmlobj, 'Generalization'):
+                gen = Generalization(xmlgeneralization.attrib)
+                self.__generalizacoes[gen.id] = gen
 
-                    # Gambiarra para evitar que sejam adicionadas generalizações em níveis abaixo do desejado.
-                    if 'Id' in gen.xml_attributes.keys():
-                        self.__generalizacoes[gen.id] = gen
-            else:
+            if not self.__generalizacoes:
                 logger.debug(u'Nenhuma generalização localizada.')
         elif data is not None:
             self.__generalizacoes = data
@@ -53,55 +49,124 @@ class Generalizations(DictBase):
         super(Generalizations, self).__init__(self.__generalizacoes, Generalizations)
 
 
+class InheritanceGraph(object):
+    """Grafo de herança das classes, montado a partir das generalizações.
+
+    Guarda os IDs dos pais e filhos diretos de cada classe e memoriza os ancestrais e descendentes já calculados, de
+    forma que hierarquias profundas não precisem ser percorridas novamente a cada consulta."""
+
+    def __init__(self, generalizations=None):
+        self.parents = dict()
+        self.children = dict()
+        self.__ancestors = dict()
+        self.__descendants = dict()
+
+        if generalizations is not None:
+            for gen in generalizations:
+                # Na generalização, a origem é a classe pai e o destino é a classe filha.
+                self.children.setdefault(gen.from_id, list()).append(gen.to_id)
+                self.parents.setdefault(gen.to_id, list()).append(gen.from_id)
+
+    def __closure(self, class_id, edges, cache):
+        """Percorre as arestas informadas a partir da classe, reaproveitando os resultados já memorizados."""
+        if class_id not in cache:
+            found = OrderedDict()
+            pending = deque(edges.get(class_id, ()))
+            while pending:
+                current = pending.popleft()
+                if current in found:
+                    continue
+                found[current] = None
+                if current in cache:
+                    for cached_id in cache[current]:
+                        found.setdefault(cached_id)
+                else:
+                    pending.extend(edges.get(current, ()))
+            found.pop(class_id, None)
+            cache[class_id] = tuple(found)
+        return cache[class_id]
+
+    def ancestors(self, class_id):
+        """IDs de todos os ancestrais da classe, dos mais próximos aos mais distantes."""
+        return self.__closure(class_id, self.parents, self.__ancestors)
+
+    def descendants(self, class_id):
+        """IDs de todos os descendentes da classe, dos mais próximos aos mais distantes."""
+        return self.__closure(class_id, self.children, self.__descendants)
+
+    def is_subclass(self, class_id, ancestor_id):
+        """Indica se a classe herda, direta ou indiretamente, da classe ancestral informada."""
+        return ancestor_id in self.ancestors(class_id)
+
+    def root(self, class_id):
+        """ID da classe raiz da hierarquia, que concentra o mapeamento polimórfico."""
+        for ancestor_id in reversed(self.ancestors(class_id)):
+            if ancestor_id not in self.parents:
+                return ancestor_id
+        return class_id
+
+
 class Association(Relationship):
     """Representa uma associação entre classes."""
+
+    __slots__ = ('tagged_values',)
+
     def __init__(self, xml_attributes, tagged_values):
-        self.xml_attributes = xml_attributes
         self.tagged_values = tagged_values
         super(Association, self).__init__(xml_attributes)
-
-    @property
-    def from_id(self):
-        """ID da classe de origem"""
-        return self.xml_attributes['EndRelationshipFromMetaModelElement']
-
-    @property
-    def to_id(self):
-        """ID da classe de origem"""
-        return self.xml_attributes['EndRelationshipToMetaModelElement']
+        self.from_id = xml_attributes.get('EndRelationshipFromMetaModelElement')
+        self.to_id = xml_attributes.get('EndRelationshipToMetaModelElement')
 
 
 class Associations(DictBase):
-    """Lista de associações do modelo UML."""
+    """Lista de associações do modelo UML.
+
+    Mantém índices das associações pelas classes de origem e de destino, montados numa única passada, de forma que as
+    consultas por classe não precisem percorrer todas as associações."""
     def __init__(self, xmlobj=None, data=None, class_id=None):
         global logger
         logger = logging.getLogger('relationships')
+        self.__from_index = dict()
+        self.__to_index = dict()
         if xmlobj is not None:
             self.__associations = dict()
-            xmlcontainer = xmlobj.Models.ModelRelationshipContainer
-            xmlassociations = xmlcontainer.iterdescendants(tag="Association")
-
-            if xmlassociations is not None:
-                for xmlassociation in xmlassociations:
-                    logger.debug(u'XML attr associação: %s' % xmlassociation.attrib)
-                    xml_attributes = xmlassociation.attrib
-                    tagged_values = TaggedValues(xmlobj=xmlassociation)
-                    association = Association(xml_attributes, tagged_values)
-
-                    # Gambiarra pra evitar que sejam adicionados associações em níveis abaixo do desejado.
-                    if 'Id' in association.xml_attributes.keys():
-                        # Verifica se é pra filtrar por classe.
-                        if class_id is not None:
-                            if association.from_id == class_id:
-                                self.__associations[association.id] = association
-                        else:
-                            self.__associations[association.id] = association
-            else:
+            for xmlassociation in relationships(xmlobj, 'Association'):
+                logger.debug(u'XML attr associação: %s' % xmlassociation.attrib)
+                xml_attributes = xmlassociation.attrib
+                tagged_values = TaggedValues(xmlobj=xmlassociation)
+                association = Association(xml_attributes, tagged_values)
+
+                # Verifica se é pra filtrar por classe.
+                if class_id is None or association.from_id == class_id:
+                    self.__add(association)
+            profiler.count('associations', len(self.__associations))
+
+            if not self.__associations:
                 logger.info(u'Nenhuma associação localizada.')
         elif data is not None:
             self.__associations = data
+            for association in data.itervalues():
+                self.__index(association)
         else:
             self.__associations = dict()
 
         # Instancia a classe superior.
         super(Associations, self).__init__(self.__associations, Associations)
+
+    def __add(self, association):
+        """Adiciona a associação à lista e aos índices."""
+        self.__associations[association.id] = association
+        self.__index(association)
+
+    def __index(self, association):
+        """Indexa a associação pelas classes de origem e de destino."""
+        self.__from_index.setdefault(association.from_id, OrderedDict())[association.id] = association
+        self.__to_index.setdefault(association.to_id, OrderedDict())[association.id] = association
+
+    def from_class(self, class_id):
+        """Associações que partem da classe informada."""
+        return Associations(data=self.__from_index.get(class_id, OrderedDict()))
+
+    def to_class(self, class_id):
+        """Associações que chegam à classe informada."""
+        return Associations(data=self.__to_index.get(class_id, OrderedDict()))
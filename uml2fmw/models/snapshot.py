@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo do cache em disco dos projetos lidos.
+
+    A leitura do XML e a montagem do modelo são refeitas a cada execução, mesmo quando apenas os templates mudaram. O
+    cache guarda o projeto já montado num arquivo pickle, identificado pelo hash do arquivo XML e pela versão do código
+    dos modelos, de forma que tanto uma mudança no XML quanto nas classes deste pacote invalidam o que foi guardado.
+    Quando o tamanho total do cache passa do limite, os arquivos usados há mais tempo são excluídos.
+"""
+
+import gc
+import os
+import logging
+import cPickle as pickle
+from hashlib import sha1
+from tempfile import mkstemp
+from os import listdir, remove, rename, makedirs, utime
+from os.path import join, exists, getsize, getmtime, dirname, abspath
+logger = logging.getLogger('snapshot')
+
+# Extensão dos arquivos do cache.
+extension = '.pickle'
+
+# Tamanho dos blocos lidos no cálculo do hash do XML.
+block_size = 1 << 20
+
+
+def code_version():
+    """Hash do código-fonte dos módulos deste pacote, que definem a forma dos objetos guardados."""
+    folder = dirname(abspath(__file__))
+    sha = sha1()
+    for filename in sorted(listdir(folder)):
+        if filename.endswith('.py'):
+            with open(join(folder, filename), 'rb') as source:
+                sha.update(source.read())
+    return sha.hexdigest()
+
+
+class SnapshotCache(object):
+    """Cache em disco dos projetos lidos, limitado a 'max_size' megabytes."""
+
+    def __init__(self, folder, max_size=256):
+        self.folder = folder
+        self.max_size = max_size * 1024 * 1024
+        self.version = code_version()
+
+    def key(self, xml_file):
+        """Chave do projeto no cache: hash do arquivo XML e da versão do código dos modelos."""
+        sha = sha1(self.version)
+        with open(xml_file, 'rb') as xf:
+            for block in iter(lambda: xf.read(block_size), b''):
+                sha.update(block)
+        return sha.hexdigest()
+
+    def path(self, key):
+        """Caminho do arquivo do projeto no cache."""
+        return join(self.folder, key + extension)
+
+    def load(self, key):
+        """Projeto guardado com a chave informada, ou None caso não exista ou não possa ser lido."""
+        path = self.path(key)
+        if not exists(path):
+            return None
+
+        # A coleta de lixo é suspensa durante a leitura, pois ela seria disparada várias vezes pela criação dos objetos
+        # do modelo sem encontrar nada a ser coletado.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, 'rb') as sf:
+                project = pickle.load(sf)
+        except Exception as e:
+            logger.warning(u'Descartando cache inválido "%s": %s' % (path, e))
+            remove(path)
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        # A data de modificação marca o último uso, usada no descarte dos arquivos mais antigos.
+        utime(path, None)
+        return project
+
+    def store(self, key, project):
+        """Guarda o projeto no cache e descarta os arquivos mais antigos caso o limite de tamanho seja ultrapassado."""
+        if not exists(self.folder):
+            makedirs(self.folder)
+
+        # As referências entre as classes são guardadas como IDs (ver Classe.__getstate__), de forma que a recursão do
+        # pickle não depende da quantidade de classes e o limite de recursão padrão é suficiente.
+        temp_path = None
+        try:
+            # Grava num arquivo temporário e renomeia, para que outra execução nunca leia um arquivo incompleto.
+            fd, temp_path = mkstemp(dir=self.folder, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as sf:
+                pickle.dump(project, sf, pickle.HIGHEST_PROTOCOL)
+            rename(temp_path, self.path(key))
+        except Exception as e:
+            logger.warning(u'Não foi possível guardar o projeto no cache: %s' % e)
+            if temp_path is not None and exists(temp_path):
+                remove(temp_path)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Exclui os arquivos usados há mais tempo até que o cache caiba no limite de tamanho."""
+        paths = [join(self.folder, f) for f in listdir(self.folder) if f.endswith(extension)]
+        paths.sort(key=getmtime, reverse=True)
+
+        total = 0
+        for path in paths:
+            total += getsize(path)
+            if total > self.max_size:
+                logger.info(u'Excluindo do cache o projeto "%s".' % path)
+                remove(path)
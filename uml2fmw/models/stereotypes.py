@@ -4,25 +4,24 @@
 import logging
 from base import Base
 from gentle.base import ListBase
+from paths import children
 logger = logging.getLogger('stereotypes')
 
 
 class Stereotype(Base):
     """Representação de um esteriótipo."""
 
+    __slots__ = ()
+
 
 class Stereotypes(ListBase):
     """Lista de estereótipos de um objeto."""
     def __init__(self, xmlobj=None, data=None):
         if xmlobj is not None:
             self.__stereotypes = list()
-            xmlstereotypes = xmlobj.iterdescendants(tag="Stereotype")
-
-            if xmlstereotypes is not None:
-                for xmlstereotype in xmlstereotypes:
-                    xml_attributes = xmlstereotype.attrib
-                    stereotype = Stereotype(xml_attributes)
-                    self.__stereotypes.append(stereotype)
+            for xmlstereotype in children(xmlobj, 'Stereotypes', 'Stereotype'):
+                stereotype = Stereotype(xmlstereotype.attrib)
+                self.__stereotypes.append(stereotype)
         else:
             self.__stereotypes = data
 
@@ -2,40 +2,31 @@
 """Classe com representações dos tagged values do modelo UML."""
 
 import logging
-from base import Base
+from base import Base, Cacheable, cached_property
 from gentle.base import OrderedDictBase
 from collections import OrderedDict
+from paths import tagged_values
+from profiling import profiler
 logger = logging.getLogger('tagged_values')
 
 
 class TaggedValue(Base):
     """Objeto que representa um tagged value."""
 
-    def __init__(self, xml_attributes, xmlobj=None):
-        self.xml_attributes = xml_attributes
-        self.datatype = dict()
-        if 'Value' not in self.xml_attributes.keys():
-            xmldatatypes = xmlobj.iterdescendants(tag="DataType")
-            for dt in xmldatatypes:
-                self.datatype = dt.attrib
-        super(TaggedValue, self).__init__(self.xml_attributes)
-
-    @property
-    def tagv_type(self):
-        """Tipo de dados do tagged value.
-
-        O nome não pode ser simplesmente 'type', pois esta é uma palavra reservada."""
-        return self.xml_attributes['Type'] if 'Type' in self.xml_attributes.keys() else ''
+    __slots__ = ('tagv_type', 'value')
 
-    @property
-    def value(self):
-        """Valor do tagged value."""
-        if 'Value' in self.xml_attributes.keys():
-            return self.xml_attributes['Value']
-        elif bool(self.datatype):
-            return self.datatype['Name']
-        else:
-            return ''
+    def __init__(self, xml_attributes, xmlobj=None):
+        # O nome do tipo não pode ser simplesmente 'type', pois esta é uma palavra reservada.
+        self.tagv_type = xml_attributes.get('Type', '')
+
+        # Sem o atributo 'Value', o valor é o nome do último tipo de dados referenciado pelo tagged value.
+        self.value = xml_attributes.get('Value')
+        if self.value is None:
+            self.value = ''
+            if xmlobj is not None:
+                for dt in xmlobj.iterdescendants(tag="DataType"):
+                    self.value = dt.get('Name', '')
+        super(TaggedValue, self).__init__(xml_attributes)
 
     @property
     def widget_related_name(self):
@@ -43,22 +34,16 @@ class TaggedValue(Base):
         return self.name.split(':')[1]
 
 
-class TaggedValues(OrderedDictBase):
+class TaggedValues(OrderedDictBase, Cacheable):
     """Tagged values associados ao objeto XML."""
 
-    def __init__(self, xmlobj=None, data=None, from_class=False):
+    def __init__(self, xmlobj=None, data=None):
         if xmlobj is not None:
             self.__tagged_values = OrderedDict()
-
-            # Se for oriundo de uma classe, tenta limitar o contexto.
-            if from_class:
-                try:
-                    xmlobj = xmlobj.TaggedValues
-                    self.__search(xmlobj)
-                except AttributeError:
-                    pass
-            else:
-                self.__search(xmlobj)
+            for xmltaggedvalue in tagged_values(xmlobj):
+                tv = TaggedValue(xmltaggedvalue.attrib, xmltaggedvalue)
+                self.__tagged_values[tv.name] = tv
+            profiler.count('tagged_values', len(self.__tagged_values))
         elif data is not None:
             self.__tagged_values = data
         else:
@@ -67,23 +52,14 @@ class TaggedValues(OrderedDictBase):
         # Instancia a classe superior.
         super(TaggedValues, self).__init__(self.__tagged_values, TaggedValues)
 
-    def __search(self, xmlobj):
-        """Faz a busca dos tagged values."""
-        xmltaggedvalues = xmlobj.iterdescendants(tag="TaggedValue")
-        if xmltaggedvalues is not None:
-            for taggedv in xmltaggedvalues:
-                tv = TaggedValue(taggedv.attrib, taggedv)
-                self.__tagged_values[tv.name] = tv
-
-    @property
+    @cached_property
     def not_widget_related(self):
         """Tagged values não relacionados ao widget."""
-        data = OrderedDict({k: self.__tagged_values[k]
-                            for k in self.__tagged_values.keys() if k not in self.widget_related.keys()})
+        data = OrderedDict((k, tv) for k, tv in self.__tagged_values.iteritems() if k.find(':') == -1)
         return TaggedValues(data=data)
 
-    @property
+    @cached_property
     def widget_related(self):
         """Tagged values relacionados ao widget."""
-        data = OrderedDict({k: self.__tagged_values[k] for k in self.__tagged_values.keys() if k.find(':') != -1})
+        data = OrderedDict((k, tv) for k, tv in self.__tagged_values.iteritems() if k.find(':') != -1)
         return TaggedValues(data=data)
@@ -1,12 +1,20 @@
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.schema import MetaData
 
+
+def column_names(constraint, table):
+    """Naming convention token with all the column names of the constraint,
+    so composite indexes starting with the same column do not clash."""
+    return '_'.join(column.name for column in constraint.columns)
+
+
 # Recommended naming convention used by Alembic, as various different database
 # providers will autogenerate vastly different names making migrations more
 # difficult. See: http://alembic.readthedocs.org/en/latest/naming.html
 NAMING_CONVENTION = {
-    "ix": 'ix_%(column_0_label)s',
-    "uq": "uq_%(table_name)s_%(column_0_name)s",
+    "column_names": column_names,
+    "ix": "ix_%(table_name)s_%(column_names)s",
+    "uq": "uq_%(table_name)s_%(column_names)s",
     "ck": "ck_%(table_name)s_%(constraint_name)s",
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
     "pk": "pk_%(table_name)s"
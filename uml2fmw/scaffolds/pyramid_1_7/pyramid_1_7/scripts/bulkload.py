@@ -0,0 +1,206 @@
+"""
+Bulk loading of seed data into the tables of the model.
+
+Each table is read from a ``<tablename>.csv`` or ``<tablename>.jsonl`` file
+and inserted in batches with Core ``executemany``, in foreign-key dependency
+order. The indexes of the loaded tables are dropped before the load and
+created again at the end, which is much faster than updating them row by row.
+
+"""
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import inspect
+
+DEFAULT_BATCH_SIZE = 10000
+
+TRUE_VALUES = ('1', 't', 'true', 'y', 'yes', 's', 'sim')
+
+
+def parse_boolean(value):
+    return value.strip().lower() in TRUE_VALUES
+
+
+def parse_date(value):
+    return datetime.strptime(value[:10], '%Y-%m-%d').date()
+
+
+def parse_datetime(value):
+    value = value.replace('T', ' ')
+    for fmt in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValueError('invalid datetime: %r' % value)
+
+
+PARSERS = {
+    bool: parse_boolean,
+    date: parse_date,
+    datetime: parse_datetime,
+    Decimal: Decimal,
+}
+
+
+def column_parser(column):
+    """Function converting the text read from a file to the column type."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return None
+    if issubclass(python_type, (type(u''), bytes)):
+        return None
+    return PARSERS.get(python_type, python_type)
+
+
+def read_csv(path):
+    """Rows of a CSV file with a header line, as dictionaries of text."""
+    if sys.version_info[0] < 3:
+        with open(path, 'rb') as f:
+            for row in csv.DictReader(f):
+                yield dict((k.decode('utf-8'), v.decode('utf-8'))
+                           for k, v in row.items())
+    else:
+        with io.open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield row
+
+
+def read_jsonl(path):
+    """Rows of a JSON-lines file, one object per line."""
+    with io.open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+READERS = (('.csv', read_csv), ('.jsonl', read_jsonl))
+
+
+def data_file(folder, tablename):
+    """Data file of the table in the folder, with its reader, or None."""
+    for extension, reader in READERS:
+        path = os.path.join(folder, tablename + extension)
+        if os.path.exists(path):
+            return path, reader
+    return None
+
+
+def convert(rows, table):
+    """Convert the rows to the column types, ignoring unknown fields.
+
+    Empty strings become NULL, since CSV has no other way of writing them.
+
+    """
+    parsers = dict((c.name, column_parser(c)) for c in table.columns)
+    for row in rows:
+        record = {}
+        for name, value in row.items():
+            if name not in parsers:
+                continue
+            if value == '' or value is None:
+                value = None
+            elif parsers[name] is not None and not isinstance(value, (bool, int, float)):
+                value = parsers[name](value)
+            record[name] = value
+        yield record
+
+
+def batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_table(connection, table, path, reader, batch_size):
+    """Insert the rows of the file in batches, returning the row count."""
+    count = 0
+    with connection.begin():
+        insert = table.insert()
+        for batch in batches(convert(reader(path), table), batch_size):
+            # all rows of an executemany must have the same keys
+            keys = set().union(*batch)
+            for record in batch:
+                for key in keys.difference(record):
+                    record[key] = None
+            connection.execute(insert, batch)
+            count += len(batch)
+    return count
+
+
+def drop_indexes(connection, table):
+    """Drop the model indexes that exist on the table."""
+    existing = set(i['name'] for i in inspect(connection).get_indexes(table.name))
+    for index in table.indexes:
+        if index.name in existing:
+            index.drop(connection)
+
+
+def create_tables(connection, tables):
+    """Create the missing tables, leaving their indexes to after the load."""
+    for table in tables:
+        indexes = table.indexes
+        table.indexes = set()
+        try:
+            table.create(connection, checkfirst=True)
+        finally:
+            table.indexes = indexes
+
+
+def load(engine, metadata, folder, tablenames, batch_size=DEFAULT_BATCH_SIZE,
+         out=sys.stdout):
+    """
+    Load the data files of the folder into the tables with the given names.
+
+    The tables are loaded in foreign-key dependency order, and the rows per
+    second of each table and of the whole load are reported to ``out``.
+
+    """
+    tables = [t for t in metadata.sorted_tables if t.name in tablenames]
+    files = dict((t.name, data_file(folder, t.name)) for t in tables)
+    tables = [t for t in tables if files[t.name] is not None]
+
+    total_rows = 0
+    start = time.time()
+    connection = engine.connect()
+    try:
+        create_tables(connection, tables)
+        for table in tables:
+            drop_indexes(connection, table)
+
+        try:
+            for table in tables:
+                path, reader = files[table.name]
+                table_start = time.time()
+                count = load_table(connection, table, path, reader, batch_size)
+                elapsed = time.time() - table_start
+                total_rows += count
+                out.write('%-30s %10d rows %8.2fs %10.0f rows/s\n' % (
+                    table.name, count, elapsed, count / elapsed if elapsed else 0))
+        finally:
+            # the indexes are restored even if some table fails to load
+            index_start = time.time()
+            indexes = [index for table in tables for index in table.indexes]
+            for index in indexes:
+                index.create(connection)
+            out.write('%d indexes created in %.2fs\n' % (
+                len(indexes), time.time() - index_start))
+    finally:
+        connection.close()
+
+    elapsed = time.time() - start
+    out.write('%-30s %10d rows %8.2fs %10.0f rows/s\n' % (
+        'total', total_rows, elapsed, total_rows / elapsed if elapsed else 0))
+    return total_rows
@@ -14,6 +14,7 @@ from ..models import (
     get_engine,
     get_session_factory,
     get_tm_session,
+    import_all,
     )
 # from ..models import MyModel
 
@@ -34,6 +35,7 @@ def main(argv=sys.argv):
     settings = get_appsettings(config_uri, options=options)
 
     engine = get_engine(settings)
+    import_all()
     Base.metadata.create_all(engine)
 
     # session_factory = get_session_factory(engine)
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Pacotes de scripts e folhas de estilo montados na geração.
+
+Cada pacote tem no nome o hash do seu conteúdo ('app.3f2a9c1b7d4e.js'), listado no 'assets/manifest.json', de forma que
+um nome nunca muda de conteúdo e pode ser guardado pelos navegadores indefinidamente. Os pacotes são gravados também
+comprimidos com gzip, e a versão comprimida é servida aos navegadores que a aceitam, sem comprimir a cada requisição."""
+
+import json
+import mimetypes
+import os
+
+from pyramid.httpexceptions import HTTPNotFound
+from pyramid.response import FileResponse
+from pyramid.view import view_config
+
+ASSETS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets')
+
+# Um ano, o máximo recomendado para o 'max-age'.
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Nomes dos pacotes e seus nomes com o hash do conteúdo, lidos do manifesto no primeiro uso.
+_manifest = None
+
+
+def manifest():
+    """Nomes dos pacotes ligados aos nomes com o hash do conteúdo."""
+    global _manifest
+    if _manifest is None:
+        with open(os.path.join(ASSETS_FOLDER, 'manifest.json')) as mf:
+            _manifest = json.load(mf)
+    return _manifest
+
+
+def asset_url(request, name):
+    """URL do pacote informado ('app.js'), com o hash do conteúdo no nome. Disponível como 'request.asset_url'."""
+    return request.route_url('assets', name=manifest()[name])
+
+
+@view_config(route_name='assets')
+def asset_view(request):
+    """Serve um pacote, comprimido com gzip quando o navegador aceita, com cache por tempo indeterminado."""
+    name = request.matchdict['name']
+    if name not in manifest().values():
+        raise HTTPNotFound()
+
+    content_type, _ = mimetypes.guess_type(name)
+    filename = os.path.join(ASSETS_FOLDER, name)
+    # Sem o cabeçalho, o webob considera aceita qualquer codificação, por isso ele é consultado diretamente.
+    gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+    response = FileResponse(filename + '.gz' if gzip else filename, request=request, content_type=content_type)
+    if gzip:
+        response.content_encoding = 'gzip'
+    response.vary = ('Accept-Encoding',)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
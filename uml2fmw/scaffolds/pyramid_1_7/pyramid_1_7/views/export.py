@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Exportação de tabelas em JSON lines ou CSV, em fluxo.
+
+As linhas são lidas com um cursor do lado do servidor ('stream_results'), em lotes do 'yield_per', e serializadas aos
+poucos no 'app_iter' da resposta, de forma que a memória usada não depende do tamanho da tabela. A consulta usa uma
+sessão própria, e não a 'request.dbsession', pois o pyramid_tm encerra a transação da requisição assim que a view
+retorna, antes de a resposta ser enviada."""
+
+import csv
+import io
+import json
+import sys
+from collections import OrderedDict
+
+from pyramid.response import Response
+
+# Quantidade de linhas lidas do banco por vez e enviadas em cada pedaço da resposta.
+BATCH_SIZE = 1000
+
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def jsonl_lines(columns, rows):
+    """Linhas em JSON, uma por registro, com as colunas como chaves, na ordem das colunas."""
+    for row in rows:
+        yield json.dumps(OrderedDict(zip(columns, row)), default=str) + '\n'
+
+
+def csv_lines(columns, rows):
+    """Linhas em CSV, começando pelo cabeçalho com os nomes das colunas."""
+    if sys.version_info[0] < 3:
+        buffer = io.BytesIO()
+
+        def encode(values):
+            return [v.encode('utf-8') if isinstance(v, unicode) else v for v in values]  # noqa
+    else:
+        buffer = io.StringIO()
+
+        def encode(values):
+            return values
+
+    writer = csv.writer(buffer)
+    writer.writerow(encode(columns))
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(encode(['' if value is None else value for value in row]))
+        yield buffer.getvalue()
+
+
+SERIALIZERS = {
+    'jsonl': jsonl_lines,
+    'csv': csv_lines,
+}
+
+
+def stream(session, query, serializer, columns):
+    """Pedaços da resposta, com BATCH_SIZE linhas cada, fechando a sessão ao final."""
+    try:
+        rows = query.with_session(session).execution_options(stream_results=True).yield_per(BATCH_SIZE)
+        chunk = []
+        for line in serializer(columns, rows):
+            chunk.append(line if isinstance(line, bytes) else line.encode('utf-8'))
+            if len(chunk) == BATCH_SIZE:
+                yield b''.join(chunk)
+                chunk = []
+        if chunk:
+            yield b''.join(chunk)
+    finally:
+        session.close()
+
+
+def export_response(request, query, columns, export_format, filename):
+    """Resposta que exporta as linhas da consulta no formato informado ('jsonl' ou 'csv').
+
+    A consulta, sem sessão, deve selecionar as colunas informadas, na mesma ordem."""
+    session = request.registry['dbsession_factory']()
+    response = Response(content_type=CONTENT_TYPES[export_format], charset='utf-8')
+    response.content_disposition = 'attachment; filename="%s.%s"' % (filename, export_format)
+    response.app_iter = stream(session, query, SERIALIZERS[export_format], columns)
+    return response
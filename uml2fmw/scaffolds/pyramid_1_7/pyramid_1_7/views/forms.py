@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Cache dos formulários das views.
+
+Montar o schema do colander e o formulário do Deform é a parte mais cara das requisições das views, por isso cada
+formulário é montado uma única vez por processo e idioma. A validação usa uma cópia do schema ligada à requisição, e o
+formulário compartilhado nunca é alterado. Com a opção 'forms.cache_html' ligada, o HTML do formulário em branco também
+é guardado, por idioma, e reaproveitado nas requisições GET."""
+
+from deform import Form
+from pyramid.settings import asbool
+from sqlalchemy.orm import configure_mappers
+
+
+class FormCache(object):
+    """Formulários de um schema, montados sob demanda e guardados por idioma."""
+
+    def __init__(self, schema_factory, buttons):
+        self.schema_factory = schema_factory
+        self.buttons = buttons
+        self.forms = dict()
+        self.blank_html = dict()
+
+    def form(self, request):
+        """Formulário compartilhado do idioma da requisição, que não deve ser alterado."""
+        locale = request.locale_name
+        form = self.forms.get(locale)
+        if form is None:
+            # O schema é criado pelo colanderalchemy quando os mapeamentos são configurados.
+            configure_mappers()
+            form = self.forms[locale] = Form(self.schema_factory().clone(), buttons=self.buttons)
+        return form
+
+    def bound_form(self, request):
+        """Cópia do formulário com o schema ligado à requisição, usada na validação."""
+        return Form(self.form(request).schema.bind(request=request), buttons=self.buttons)
+
+    def render_blank(self, request):
+        """HTML do formulário em branco, guardado quando a opção 'forms.cache_html' está ligada."""
+        if not asbool(request.registry.settings.get('forms.cache_html', False)):
+            return self.form(request).render()
+
+        locale = request.locale_name
+        html = self.blank_html.get(locale)
+        if html is None:
+            html = self.blank_html[locale] = self.form(request).render()
+        return html
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo da área de preparação dos arquivos gerados.
+
+    Os arquivos gerados são escritos primeiro numa pasta temporária ao lado da aplicação. Ao confirmar, a pasta de
+    preparação é completada com os arquivos da aplicação que não mudaram, ligados com hard links (ou copiados, onde não
+    há hard links), e toma o lugar da aplicação com duas renomeações de pasta: a aplicação atual é posta de lado e a
+    pasta de preparação é movida para o lugar dela. Assim, uma falha durante a renderização ou a gravação não deixa a
+    aplicação gerada pela metade, e o servidor de desenvolvimento nunca recarrega um arquivo escrito parcialmente.
+    Arquivos cujo conteúdo não mudou não são reescritos, mantendo a data de modificação.
+"""
+
+import os
+import logging
+import filecmp
+from shutil import rmtree, copy2
+from os import makedirs, rename, walk, rmdir, listdir
+from os.path import join, exists, dirname, basename, getsize, relpath
+logger = logging.getLogger('staging')
+
+
+class Staging(object):
+    """Área de preparação dos arquivos de uma aplicação gerada na pasta 'to_folder'."""
+
+    def __init__(self, to_folder):
+        self.to_folder = to_folder
+        self.folder = join(dirname(to_folder), '.%s.staging' % basename(to_folder))
+        self.backup_folder = join(dirname(to_folder), '.%s.old' % basename(to_folder))
+        self.staged = set()
+        self.removed = set()
+
+        # Descarta uma preparação anterior interrompida.
+        if exists(self.folder):
+            rmtree(self.folder)
+
+    def write(self, genfile, content):
+        """Prepara o arquivo com o conteúdo informado, caso seja diferente do atual. Retorna se foi preparado."""
+        target_file = join(self.to_folder, genfile)
+        staged_file = self.__stage(genfile)
+        if exists(target_file) and getsize(target_file) == len(content):
+            with open(target_file, 'rb') as tf:
+                if tf.read() == content:
+                    return False
+
+        with open(staged_file, 'wb') as sf:
+            sf.write(content)
+        return True
+
+    def copy(self, source_file, genfile):
+        """Prepara a cópia do arquivo, caso seja diferente do atual. Retorna se foi preparado."""
+        target_file = join(self.to_folder, genfile)
+        staged_file = self.__stage(genfile)
+        if exists(target_file) and filecmp.cmp(source_file, target_file, shallow=False):
+            return False
+
+        copy2(source_file, staged_file)
+        return True
+
+    def __stage(self, genfile):
+        """Caminho do arquivo na pasta de preparação, criando as pastas necessárias.
+
+        Cada arquivo só pode ser preparado uma vez: dois arquivos gerados com o mesmo caminho indicam um conflito de
+        nomes no scaffold."""
+        if genfile in self.staged:
+            raise ValueError(u'Arquivo "%s" preparado mais de uma vez.' % genfile)
+        self.staged.add(genfile)
+
+        staged_file = join(self.folder, genfile)
+        if not exists(dirname(staged_file)):
+            makedirs(dirname(staged_file))
+        return staged_file
+
+    def prune(self, genfiles, recorded):
+        """Prepara a exclusão dos arquivos registrados num manifesto anterior ('recorded') que não estão entre os
+        arquivos gerados agora ('genfiles'). Arquivos que o gerador nunca escreveu, como bancos de dados e arquivos
+        compilados, são mantidos.
+
+        Retorna os caminhos relativos dos arquivos que serão excluídos."""
+        removed = sorted(genfile for genfile in set(recorded) - set(genfiles)
+                         if exists(join(self.to_folder, genfile)))
+        self.removed.update(removed)
+        return removed
+
+    def commit(self):
+        """Completa a pasta de preparação com os arquivos que não mudaram e a coloca no lugar da aplicação.
+
+        Retorna a quantidade de arquivos escritos ou excluídos. Em caso de falha, a aplicação anterior é restaurada."""
+        written = len([genfile for genfile in self.staged if exists(join(self.folder, genfile))])
+        if not written and not self.removed:
+            self.discard()
+            return 0
+
+        self.__link_unchanged()
+        if exists(self.backup_folder):
+            rmtree(self.backup_folder)
+        if exists(self.to_folder):
+            rename(self.to_folder, self.backup_folder)
+        try:
+            rename(self.folder, self.to_folder)
+        except Exception:
+            if exists(self.backup_folder):
+                rename(self.backup_folder, self.to_folder)
+            raise
+        if exists(self.backup_folder):
+            rmtree(self.backup_folder)
+
+        committed = written + len(self.removed)
+        logger.info(u'%d arquivos atualizados em "%s".' % (committed, basename(self.to_folder)))
+        self.staged = set()
+        self.removed = set()
+        return committed
+
+    def __link_unchanged(self):
+        """Liga na pasta de preparação os arquivos da aplicação que não foram preparados nem excluídos, e remove as
+        pastas que ficaram vazias com as exclusões."""
+        link = getattr(os, 'link', copy2)
+        for root, _, filenames in walk(self.to_folder):
+            staged_root = join(self.folder, relpath(root, self.to_folder))
+            if not exists(staged_root):
+                makedirs(staged_root)
+            for filename in filenames:
+                genfile = relpath(join(root, filename), self.to_folder)
+                staged_file = join(self.folder, genfile)
+                if genfile not in self.removed and not exists(staged_file):
+                    link(join(root, filename), staged_file)
+
+        for genfile in self.removed:
+            folder = dirname(join(self.folder, genfile))
+            while folder != self.folder and exists(folder) and not listdir(folder):
+                rmdir(folder)
+                folder = dirname(folder)
+
+    def discard(self):
+        """Descarta a pasta de preparação, sem alterar a aplicação."""
+        if exists(self.folder):
+            rmtree(self.folder)
+        self.staged = set()
+        self.removed = set()
@@ -7,6 +7,14 @@ Usage:
     [--show-code | -c]
     [--show-object | -o]
     [--compile]
+    [--import-check]
+    [--incremental | -i]
+    [--jobs N | -j N]
+    [--watch | -w]
+    [--interval S]
+    [--config ARQUIVO]
+    [--set OPCAO=VALOR]...
+    [--profile RELATORIO [--profile-phase FASE]]
     ARQUIVO
 
 Arguments:
@@ -15,12 +23,28 @@ Arguments:
 Options:
     -c, --show-code           Mostra o código gerado no log.
     -o, --show-object         Mostra os objetos das classes geradas.
-    --compile                 Indica se o código python gerado deve ser compilado.
+    --compile                 Compila o código python gerado, em paralelo conforme --jobs, e mostra os erros.
+    --import-check            Além de compilar, importa o pacote gerado num processo separado e mostra os erros.
+    -i, --incremental         Reescreve apenas os arquivos cuja origem mudou desde a última geração.
+    -j N, --jobs N            Quantidade de processos usados na renderização dos templates [default: 1].
+    -w, --watch               Após a geração, observa o XML e o scaffold e atualiza a aplicação a cada mudança.
+    --interval S              Intervalo em segundos entre as verificações do modo de observação [default: 1].
+    --config ARQUIVO          Arquivo de configuração do gerador [default: config.yml].
+    -s OPCAO=VALOR, --set OPCAO=VALOR
+                              Sobrescreve uma opção do arquivo de configuração, como em --set scaffold=pyramid_1_7.
+    --profile RELATORIO       Grava em JSON os tempos de cada fase da geração e as contagens de objetos.
+    --profile-phase FASE      Analisa a fase informada com o cProfile, como em --profile-phase model.connect. As
+                              estatísticas são gravadas junto ao relatório, com a extensão '.prof'.
 """
 
+import sys
 import logging
 from docopt import docopt
+from config import Config
 from generator import Generator
+from models.profiling import profiler
+from watcher import Watcher
+from verifier import compile_all, import_check
 from logging.config import fileConfig
 
 __author__ = u'Rogério Pereira'
@@ -29,19 +53,35 @@ __version__ = '1.0'
 
 
 if __name__ == '__main__':
+    # Faz toda a macumba com os parâmetros da linha de comando <3.
+    parametros_script = docopt(__doc__)
+
     # Carrega a configuração do log.
-    fileConfig('logging_config.ini')
+    fileConfig('logging_config.ini', disable_existing_loggers=False)
     logger = logging.getLogger(__name__)
 
-    # Faz toda a macumba com os parâmetros da linha de comando <3.
-    parametros_script = docopt(__doc__)
+    # Lê a configuração uma única vez, aplicando as opções informadas na linha de comando.
+    config = Config.load(parametros_script['--config'])
+    for assignment in parametros_script['--set']:
+        config.set(assignment)
+
+    # Caso solicitado, liga a instrumentação das fases da geração.
+    if parametros_script['--profile']:
+        profiler.enable(parametros_script['--profile-phase'])
 
     # Renderiza a aplicação.
     logger.info(u'Iniciando geração da aplicação.')
-    generator = Generator(parametros_script['ARQUIVO'])
-    genfiles_and_codes = generator.generate()
+    with profiler.phase('total'):
+        generator = Generator(parametros_script['ARQUIVO'], config)
+        with profiler.phase('generate'):
+            genfiles_and_codes = generator.generate(incremental=parametros_script['--incremental'],
+                                                    jobs=int(parametros_script['--jobs']))
     logger.info(u'Aplicação gerada com sucesso.')
 
+    if parametros_script['--profile']:
+        profiler.save(parametros_script['--profile'])
+        logger.info(u'Relatório de desempenho gravado em "%s".' % parametros_script['--profile'])
+
     # Caso informado, loga o código.
     if parametros_script['--show-code']:
         for genfile, code in genfiles_and_codes.items():
@@ -51,11 +91,22 @@ if __name__ == '__main__':
     if parametros_script['--show-object']:
         logger.info(u'Classes no arquivo XML:\n%s' % generator.project.classes)
 
-    # Caso solicitado, compila o código gerado.
-    compile_param = parametros_script['--compile']
-    if compile_param:
-        pyfiles = [f for f in genfiles_and_codes.keys() if f.find('.py') != -1]
-        for genfile in pyfiles:
-            logger.info(u'Compilando arquivo "%s".' % genfile)
-            execfile(genfile)
-            logger.info(u'Compilado com sucesso "%s".' % genfile)
+    # Caso solicitado, verifica o código gerado.
+    if parametros_script['--compile'] or parametros_script['--import-check']:
+        to_folder = config.generated_folder(generator.project.name)
+        errors = compile_all(to_folder, jobs=int(parametros_script['--jobs']))
+        if parametros_script['--import-check'] and not errors:
+            errors = import_check(to_folder, generator.project.name)
+
+        for filename, line, message in errors:
+            logger.error(u'%s:%s: %s' % (filename, line if line is not None else '?', message))
+        if errors:
+            logger.error(u'A verificação encontrou %d erros no código gerado.' % len(errors))
+            sys.exit(1)
+        logger.info(u'Código gerado verificado com sucesso.')
+
+    # Caso solicitado, mantém o gerador carregado e atualiza a aplicação a cada mudança.
+    if parametros_script['--watch']:
+        watcher = Watcher(generator, interval=float(parametros_script['--interval']),
+                          jobs=int(parametros_script['--jobs']))
+        watcher.watch()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo de verificação do código gerado.
+
+    Os arquivos python da aplicação gerada são compilados com o py_compile, em paralelo, sem executar o código deles no
+    processo do gerador. Opcionalmente, o pacote gerado é importado por inteiro num processo separado, o que revela
+    erros que só aparecem na importação, como classes inexistentes ou relacionamentos mal configurados. Os erros são
+    retornados com o arquivo e a linha em que ocorreram.
+"""
+
+import sys
+import json
+import logging
+import py_compile
+import subprocess
+from os import walk
+from os.path import join
+
+# Script executado no processo separado do teste de importação. Importa todos os módulos do pacote informado, exceto
+# os de testes, e configura os mapeamentos do SQLAlchemy, caso o pacote de modelos tenha a função 'import_all'.
+import_script = '''
+import sys, json, pkgutil, importlib, traceback
+from os.path import abspath
+
+package_name = sys.argv[1]
+package_folder = abspath(package_name)
+errors = list()
+
+def report(module_name):
+    exc_type, exc_value, exc_tb = sys.exc_info()
+    filename, line = None, None
+    if isinstance(exc_value, SyntaxError):
+        filename, line = exc_value.filename, exc_value.lineno
+    else:
+        for frame in traceback.extract_tb(exc_tb):
+            if abspath(frame[0]).startswith(package_folder):
+                filename, line = frame[0], frame[1]
+    errors.append({'module': module_name, 'file': filename, 'line': line,
+                   'error': traceback.format_exception_only(exc_type, exc_value)[-1].strip()})
+
+try:
+    package = importlib.import_module(package_name)
+    for _, module_name, _ in pkgutil.walk_packages(package.__path__, package_name + '.', onerror=report):
+        if module_name.split('.')[-1].startswith('test'):
+            continue
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            report(module_name)
+
+    models = sys.modules.get(package_name + '.models')
+    if models is not None and hasattr(models, 'import_all'):
+        try:
+            models.import_all()
+        except Exception:
+            report(package_name + '.models')
+except Exception:
+    report(package_name)
+
+print(json.dumps(errors))
+'''
+
+
+def python_files(folder):
+    """Arquivos python da pasta informada e das subpastas."""
+    files = list()
+    for root, _, filenames in walk(folder):
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                files.append(join(root, filename))
+    return files
+
+
+def compile_file(filename):
+    """Compila o arquivo python, retornando None ou o erro como (arquivo, linha, mensagem)."""
+    try:
+        py_compile.compile(filename, doraise=True)
+    except py_compile.PyCompileError as e:
+        error = e.exc_value
+        line = error.lineno if isinstance(error, SyntaxError) else None
+        return filename, line, e.exc_type_name + ': ' + (error.msg if isinstance(error, SyntaxError) else str(error))
+    return None
+
+
+def compile_all(folder, jobs=1):
+    """Compila todos os arquivos python da pasta, usando 'jobs' processos, e retorna a lista de erros."""
+    logger = logging.getLogger('verifier')
+    files = python_files(folder)
+    logger.info(u'Compilando %d arquivos python em %d processos.' % (len(files), jobs))
+
+    if jobs <= 1 or len(files) <= 1:
+        results = [compile_file(filename) for filename in files]
+    else:
+        from multiprocessing import Pool
+        pool = Pool(min(jobs, len(files)))
+        try:
+            results = pool.map(compile_file, files)
+        finally:
+            pool.close()
+            pool.join()
+    return [result for result in results if result is not None]
+
+
+def import_check(folder, package, python=None):
+    """Importa o pacote gerado num processo separado, retornando a lista de erros como (arquivo, linha, mensagem).
+
+    O processo usa o interpretador informado em 'python' (por padrão, o mesmo do gerador) e roda a partir da pasta da
+    aplicação gerada, de forma que nada do que é executado na importação afeta o processo do gerador."""
+    logger = logging.getLogger('verifier')
+    logger.info(u'Importando o pacote "%s" num processo separado.' % package)
+    process = subprocess.Popen([python or sys.executable, '-c', import_script, package], cwd=folder,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    output, error_output = process.communicate()
+    try:
+        errors = json.loads(output.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        return [(None, None, u'O teste de importação falhou: %s' % error_output.decode('utf-8', 'replace').strip())]
+    return [(error['file'], error['line'], u'%s (%s)' % (error['error'], error['module'])) for error in errors]
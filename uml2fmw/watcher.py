@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+    Módulo do modo de observação.
+
+    Mantém o gerador carregado e verifica periodicamente o arquivo XML e a pasta do scaffold. A cada mudança, o XML só é
+    lido novamente se o arquivo mudou, o projeto só é trocado se o modelo mudou (e não apenas os diagramas), e a
+    aplicação é atualizada de forma incremental, renderizando apenas os templates afetados. Uma falha, como um XML
+    exportado pela metade ou um erro num template, é registrada no log sem encerrar a observação, e a atualização é
+    tentada novamente na próxima alteração.
+"""
+
+import time
+import logging
+from os import walk, stat
+from os.path import join, exists
+
+
+def signature(path):
+    """Tamanho e data de modificação de um arquivo, ou None caso ele não exista."""
+    if not exists(path):
+        return None
+    file_stat = stat(path)
+    return file_stat.st_size, file_stat.st_mtime
+
+
+def folder_signature(folder):
+    """Assinaturas de todos os arquivos da pasta, pelo caminho do arquivo."""
+    signatures = dict()
+    for root, _, filenames in walk(folder):
+        for filename in filenames:
+            path = join(root, filename)
+            signatures[path] = signature(path)
+    return signatures
+
+
+class Watcher(object):
+    """Observa o XML do modelo e o scaffold, regenerando a aplicação a cada mudança."""
+
+    def __init__(self, generator, interval=1.0, jobs=1):
+        self.generator = generator
+        self.interval = interval
+        self.jobs = jobs
+        self.xml_signature = signature(generator.xml_file)
+        self.scaffold_signature = folder_signature(generator.scaffold_folder)
+        # Assinaturas (XML, scaffold) da última atualização que falhou, ou None caso a última tenha dado certo.
+        self.failed_signature = None
+
+    def watch(self):
+        """Observa as mudanças até que o processo seja interrompido."""
+        logger = logging.getLogger('watcher')
+        logger.info(u'Observando "%s" e o scaffold. Pressione Ctrl+C para encerrar.' % self.generator.xml_file)
+        try:
+            while True:
+                time.sleep(self.interval)
+                self.check()
+        except KeyboardInterrupt:
+            logger.info(u'Observação encerrada.')
+
+    def check(self):
+        """Verifica se o XML ou o scaffold mudaram e, nesse caso, atualiza a aplicação.
+
+        Retorna os códigos dos arquivos renderizados, ou None caso nada tenha mudado ou a atualização tenha falhado. Em
+        caso de falha, as assinaturas da última atualização bem-sucedida são mantidas, e a próxima alteração dos
+        arquivos tenta novamente."""
+        xml_signature = signature(self.generator.xml_file)
+        scaffold_signature = folder_signature(self.generator.scaffold_folder)
+        xml_changed = xml_signature != self.xml_signature
+        scaffold_changed = scaffold_signature != self.scaffold_signature
+        if not xml_changed and not scaffold_changed or (xml_signature, scaffold_signature) == self.failed_signature:
+            return None
+
+        logger = logging.getLogger('watcher')
+        start = time.time()
+        try:
+            # Um XML exportado novamente pode ter mudado só nos diagramas, caso em que a aplicação não muda. Depois de
+            # uma falha, a aplicação é atualizada de qualquer forma, pois o projeto pode já ter sido trocado.
+            model_changed = xml_changed and xml_signature is not None and self.generator.reload()
+            if not model_changed and not scaffold_changed and self.failed_signature is None:
+                self.xml_signature = xml_signature
+                logger.info(u'XML alterado sem mudanças no modelo (%.3fs).' % (time.time() - start))
+                return None
+
+            genfiles_and_codes = self.generator.generate(incremental=True, jobs=self.jobs)
+        except Exception:
+            self.failed_signature = (xml_signature, scaffold_signature)
+            logger.exception(u'Falha ao atualizar a aplicação (%.3fs). Nova tentativa na próxima alteração.' %
+                             (time.time() - start))
+            return None
+
+        self.xml_signature = xml_signature
+        self.scaffold_signature = scaffold_signature
+        self.failed_signature = None
+        logger.info(u'Aplicação atualizada em %.3fs (modelo %s, scaffold %s).' %
+                    (time.time() - start, u'alterado' if model_changed else u'inalterado',
+                     u'alterado' if scaffold_changed else u'inalterado'))
+        return genfiles_and_codes